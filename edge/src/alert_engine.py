@@ -30,7 +30,7 @@ Configuración:
 ============================================================================
 """
 
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta
 from logger import logger
 from database import Database
@@ -192,7 +192,7 @@ class AlertEngine:
         
         # Debouncing: evitar spam de alertas del mismo tipo
         if not self._should_create_alert(sensor_id, code):
-            logger.debug(f"Alerta {code} para {sensor_id} en debounce, ignorando")
+            logger.debug("Alerta %s para %s en debounce, ignorando", code, sensor_id)
             return None
         
         # Crear alerta
@@ -220,6 +220,42 @@ class AlertEngine:
         return alert_data
     
     
+    def check_batch(self, batch: List[Tuple[str, float, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Verifica umbrales de todas las medidas de un paquete en una sola pasada.
+        
+        Equivalente a llamar check_measurement_thresholds() por cada medida, pero la
+        auto-resolución de los valores que vuelven a rango consulta las alertas activas
+        en BD una sola vez por paquete (en lugar de dos consultas por medida).
+        
+        Args:
+            batch: Lista de tuplas (sensor_id, value, sensor_config)
+        
+        Returns:
+            Lista de alertas generadas
+        """
+        alerts_generated = []
+        in_range = {}  # {sensor_id: motivo de resolución}
+        
+        for sensor_id, value, sensor_config in batch:
+            alarm_lo = sensor_config.get('alarm_lo')
+            alarm_hi = sensor_config.get('alarm_hi')
+            if alarm_lo is None and alarm_hi is None:
+                continue
+            
+            if (alarm_lo is not None and value < alarm_lo) or (alarm_hi is not None and value > alarm_hi):
+                alert = self.check_measurement_thresholds(sensor_id, value, sensor_config)
+                if alert:
+                    alerts_generated.append(alert)
+            else:
+                in_range[sensor_id] = f"Valor normalizado: {value:.2f} {sensor_config.get('unit', '')}"
+        
+        if in_range:
+            self._auto_acknowledge_threshold_alerts(in_range)
+        
+        return alerts_generated
+    
+    
     # ========================================================================
     # MONITOREO DE ESTADO DE DISPOSITIVOS
     # ========================================================================
@@ -379,7 +415,10 @@ class AlertEngine:
         """Loop principal del thread de monitoreo."""
         logger.info("🔍 Thread de monitoreo de alertas iniciado")
         
+        # Plazos absolutos (monotónicos): el tiempo de cada verificación no se suma al periodo
+        deadline = time.monotonic()
         while self._monitoring_active:
+            deadline += interval
             try:
                 # Verificar estado de dispositivos
                 self.check_device_status()
@@ -390,8 +429,14 @@ class AlertEngine:
             except Exception as e:
                 logger.error(f"Error en monitoreo de alertas: {e}", exc_info=True)
             
-            # Esperar intervalo
-            time.sleep(interval)
+            # Esperar hasta el siguiente plazo; si la verificación se ha pasado del
+            # intervalo, se sigue sin esperar y se reinicia la referencia
+            sleep_for = deadline - time.monotonic()
+            if sleep_for > 0:
+                time.sleep(sleep_for)
+            else:
+                logger.warning("⚠️ Monitoreo de alertas excedió el intervalo en %.3fs", -sleep_for)
+                deadline = time.monotonic()
         
         logger.info("🔍 Thread de monitoreo de alertas finalizado")
     
@@ -711,6 +756,45 @@ class AlertEngine:
             logger.error(f"Error en auto-resolución masiva para {sensor_or_device_id}/{code}: {e}", exc_info=True)
     
     
+    def _auto_acknowledge_threshold_alerts(self, reasons: Dict[str, str]):
+        """
+        Auto-reconoce las alertas de umbral (LO/HI) de varios sensores con una sola consulta.
+        
+        Args:
+            reasons: {sensor_id: razón de la resolución automática}
+        """
+        threshold_codes = ("THRESHOLD_EXCEEDED_LO", "THRESHOLD_EXCEEDED_HI")
+        try:
+            active_alerts = self.db.get_alerts(ack=False, limit=1000)
+            
+            for alert in active_alerts:
+                sensor_id = alert.get('sensor_id')
+                code = alert.get('code')
+                if sensor_id not in reasons or code not in threshold_codes:
+                    continue
+                
+                alert_id = alert.get('id')
+                self.db.acknowledge_alert(alert_id)
+                
+                if self.socketio:
+                    self.socketio.emit('alert_acknowledged', {
+                        'alert_id': alert_id,
+                        'auto': True,
+                        'reason': reasons[sensor_id]
+                    }, namespace='/')
+                
+                logger.info(f"✅ Auto-resolución: alerta {alert_id} ({code}) para {sensor_id} reconocida - {reasons[sensor_id]}")
+        
+        except Exception as e:
+            logger.error(f"Error en auto-resolución de umbrales para {list(reasons)}: {e}", exc_info=True)
+        
+        # Limpiar caches de alertas activas y de debouncing
+        for sensor_id in reasons:
+            for code in threshold_codes:
+                self._active_alerts_cache.pop((sensor_id, code), None)
+                self._last_alert_cache.pop((sensor_id, code), None)
+    
+    
     def _rebuild_active_alerts_cache(self):
         """
         Reconstruye el cache de alertas activas desde la base de datos.
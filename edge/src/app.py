@@ -30,6 +30,7 @@ from database import Database, init_db
 from alert_engine import AlertEngine
 from mqtt_bridge import MQTTBridge
 import threading
+import time
 
 # Inicializar Flask
 app = Flask(__name__, 
@@ -48,6 +49,21 @@ database: Database = None
 alert_engine: AlertEngine = None
 mqtt_bridge = None  # Puente MQTT para IoT platforms
 
+@app.teardown_appcontext
+def release_db_connection(exc):
+    """Devuelve al pool la conexión SQLite usada por el thread de la petición"""
+    if database is not None:
+        database.release()
+
+# Retención de medidas en BD (particiones diarias más antiguas se eliminan)
+DATA_RETENTION_DAYS = 30
+RETENTION_INTERVAL_SEC = 24 * 3600  # Rotación una vez al día
+
+# Caché de /api/diagnostics: {unit_id: (monotonic, resultado)}. La página de diagnóstico
+# consulta cada dispositivo cada 5 s por pestaña abierta; dentro de la ventana de frescura
+# se responde sin volver a leer los registros por el bus
+diagnostics_cache = {}
+
 # Estado del discovery
 discovery_state = {
     'active': False,
@@ -81,9 +97,12 @@ def init_modbus():
         logger.info("✅ Base de datos inicializada")
         
         # Limpieza de datos antiguos (opcional)
-        deleted = database.cleanup_old_data(days=30)
+        deleted = database.cleanup_old_data(days=DATA_RETENTION_DAYS)
         if deleted > 0:
             logger.info(f"🗑️ Limpieza inicial: {deleted} medidas antiguas eliminadas")
+        
+        # Rotación diaria de particiones de medidas (DROP de días fuera de retención)
+        threading.Thread(target=_retention_loop, daemon=True, name="db-retention").start()
     except Exception as e:
         logger.error(f"Error al inicializar base de datos: {e}")
         # Continuar sin BD (degraded mode)
@@ -140,8 +159,29 @@ def init_modbus():
     return True
 
 
-def start_initial_discovery():
-    """Lanza un escaneo completo de la red al arrancar en un hilo en background."""
+def _retention_loop():
+    """Aplica la retención de medidas una vez al día (thread en background)"""
+    while True:
+        time.sleep(RETENTION_INTERVAL_SEC)
+        if not database:
+            continue
+        try:
+            database.cleanup_old_data(days=DATA_RETENTION_DAYS)
+        except Exception as e:
+            logger.error(f"Error en rotación diaria de medidas: {e}")
+
+
+def start_initial_discovery(full_scan: bool = False):
+    """
+    Lanza el discovery de la red en un hilo en background.
+    
+    Arranque rápido (full_scan=False): los dispositivos registrados en la tabla
+    'devices' de un arranque anterior se sondean directamente, sin escanear todo el
+    rango de UnitIDs. Si no hay ninguno registrado se escanea el rango completo; si
+    alguno no responde, se escanea el resto del rango (sin los ya encontrados) y los
+    conocidos que fallaron se resondean en ese escaneo. Los discovery pedidos
+    explícitamente (API, RPC) usan full_scan=True.
+    """
     from config import Config as C
     global discovery_state
 
@@ -157,7 +197,6 @@ def start_initial_discovery():
         global discovery_state
         try:
             discovery_state['active'] = True
-            discovery_state['total'] = C.DEVICE_UNIT_ID_MAX - C.DEVICE_UNIT_ID_MIN + 1
 
             def progress_callback(current, total, unit_id):
                 discovery_state['current'] = current
@@ -169,8 +208,29 @@ def start_initial_discovery():
                     'percentage': int((current / total) * 100)
                 })
 
-            logger.info(f"🔎 Escaneo inicial de red {C.DEVICE_UNIT_ID_MIN}..{C.DEVICE_UNIT_ID_MAX} al arrancar")
-            devices = device_manager.discover_devices(C.DEVICE_UNIT_ID_MIN, C.DEVICE_UNIT_ID_MAX, progress_callback=progress_callback)
+            devices = None
+            known_ids = [d['unit_id'] for d in database.get_all_devices()] if database and not full_scan else []
+            if known_ids:
+                discovery_state['total'] = len(known_ids)
+                logger.info(f"⚡ Arranque rápido: sondeando {len(known_ids)} dispositivo(s) conocido(s): {known_ids}")
+                devices = device_manager.discover_devices(unit_ids=known_ids, progress_callback=progress_callback)
+                if len(devices) < len(known_ids):
+                    found_ids = {d.unit_id for d in devices}
+                    rest_ids = [uid for uid in range(C.DEVICE_UNIT_ID_MIN, C.DEVICE_UNIT_ID_MAX + 1)
+                                if uid not in found_ids]
+                    discovery_state['total'] = len(rest_ids)
+                    logger.info(f"ℹ️  Algún dispositivo conocido no responde; se escanea el resto de la red ({len(rest_ids)} UnitIDs)")
+                    # skip_missing=False: el sondeo anterior acaba de meter en la caché negativa
+                    # a los conocidos que fallaron (en el arranque no hay más entradas)
+                    devices += device_manager.discover_devices(
+                        unit_ids=rest_ids, progress_callback=progress_callback, skip_missing=False
+                    )
+                    devices.sort(key=lambda d: d.unit_id)
+            
+            if devices is None:
+                discovery_state['total'] = C.DEVICE_UNIT_ID_MAX - C.DEVICE_UNIT_ID_MIN + 1
+                logger.info(f"🔎 Escaneo de red {C.DEVICE_UNIT_ID_MIN}..{C.DEVICE_UNIT_ID_MAX}")
+                devices = device_manager.discover_devices(C.DEVICE_UNIT_ID_MIN, C.DEVICE_UNIT_ID_MAX, progress_callback=progress_callback)
             
             # Emitir evento de finalización
             socketio.emit('discovery_complete', {
@@ -384,6 +444,10 @@ def _register_sensors_to_database(devices):
         
         logger.info(f"✅ Total de {len(devices)} dispositivos registrados en BD")
         
+        # Umbrales posiblemente modificados → invalidar caché de sensores del polling
+        if polling_service:
+            polling_service.invalidate_sensor()
+        
         # Estadísticas de sensores
         stats = database.get_db_stats()
         logger.info(f"📊 Dispositivos en BD: {stats.get('device_count', 'N/A')}")
@@ -407,6 +471,18 @@ def emit_diagnostic(diagnostic_data: dict):
     logger.debug(f"🔍 WebSocket emit: diagnostic_update para unit {diagnostic_data.get('unit_id')}")
 
 
+def _bus_call(fn, *args, **kwargs):
+    """
+    Ejecuta una operación Modbus de la API con el bus en exclusiva.
+    
+    Las rutas REST comparten el puerto con el polling y el discovery: sin el
+    lock del bus (ModbusMaster.bus_lock) sus tramas podrían intercalarse con
+    las de otra transacción en vuelo.
+    """
+    with modbus_master.bus_lock:
+        return fn(*args, **kwargs)
+
+
 def _publish_sensors_inventory():
     """
     Publica inventario completo de dispositivos y sensores a ThingsBoard.
@@ -423,15 +499,17 @@ def _publish_sensors_inventory():
         # Obtener todos los dispositivos de la BD
         devices_data = database.get_all_devices(enabled_only=False)
         
+        # Sensores de todos los dispositivos en una sola consulta
+        sensors_by_unit = database.get_all_sensors_grouped()
+        
         # Construir información enriquecida
         devices_info = []
         
         for dev_data in devices_data:
             unit_id = dev_data['unit_id']
             
-            # Obtener lista de sensores para este dispositivo
-            sensors = database.get_sensors_by_device(unit_id)
-            sensor_ids = [s['sensor_id'] for s in sensors] if sensors else []
+            # Lista de sensores de este dispositivo
+            sensor_ids = [s['sensor_id'] for s in sensors_by_unit.get(unit_id, ())]
             
             # Determinar estado online (desde polling_service si está disponible)
             online = False
@@ -522,6 +600,19 @@ def api_discover():
     data = request.get_json() or {}
     unit_id_min = data.get('unit_id_min', Config.DEVICE_UNIT_ID_MIN)
     unit_id_max = data.get('unit_id_max', Config.DEVICE_UNIT_ID_MAX)
+    # Margen de respuesta por UnitID sondeado (opcional, por despliegue)
+    scan_budget_ms = data.get('scan_budget_ms')
+    if scan_budget_ms is not None and (
+            isinstance(scan_budget_ms, bool)
+            or not isinstance(scan_budget_ms, (int, float))
+            or not 0 < scan_budget_ms < float('inf')):
+        return jsonify({
+            'status': 'error',
+            'message': 'scan_budget_ms debe ser un número positivo (ms)'
+        }), 400
+    discovery_timeout = scan_budget_ms / 1000.0 if scan_budget_ms is not None else None
+    # no_neg_cache: resondear también los UnitIDs que no respondieron hace poco
+    skip_missing = not data.get('no_neg_cache', False)
     
     logger.info(f"Discovery solicitado: {unit_id_min}..{unit_id_max}")
     
@@ -544,7 +635,11 @@ def api_discover():
             })
         
         try:
-            devices = device_manager.discover_devices(unit_id_min, unit_id_max, progress_callback=progress_callback)
+            devices = device_manager.discover_devices(
+                unit_id_min, unit_id_max,
+                discovery_timeout=discovery_timeout, progress_callback=progress_callback,
+                skip_missing=skip_missing
+            )
             
             # Emitir evento de finalización
             socketio.emit('discovery_complete', {
@@ -659,7 +754,7 @@ def api_discovery_start():
     try:
         # Lanzar discovery en thread separado
         import threading
-        discovery_thread = threading.Thread(target=start_initial_discovery, daemon=True)
+        discovery_thread = threading.Thread(target=start_initial_discovery, kwargs={'full_scan': True}, daemon=True)
         discovery_thread.start()
         
         return jsonify({
@@ -721,7 +816,8 @@ def api_identify(unit_id):
     data = request.get_json() or {}
     duration_sec = data.get('duration_sec', 10)
     
-    result = device_manager.identify_device(unit_id, duration_sec)
+    result = _bus_call(device_manager.identify_device, unit_id, duration_sec)
+    diagnostics_cache.pop(unit_id, None)
     if result['success']:
         return jsonify({
             'status': 'ok',
@@ -742,7 +838,8 @@ def api_alias(unit_id):
         return jsonify({'error': 'Alias is required'}), 400
     
     # Solo escribe el alias en los registros Modbus (RAM)
-    success = device_manager.write_alias_to_ram(unit_id, alias)
+    success = _bus_call(device_manager.write_alias_to_ram, unit_id, alias)
+    diagnostics_cache.pop(unit_id, None)
     if success:
         device = device_manager.get_device(unit_id)
         return jsonify({
@@ -757,7 +854,7 @@ def api_alias(unit_id):
 @app.route('/api/devices/<int:unit_id>/save_eeprom', methods=['POST'])
 def api_save_eeprom(unit_id):
     """Guarda configuración actual (UnitID + Alias) en EEPROM"""
-    success = device_manager.save_to_eeprom(unit_id)
+    success = _bus_call(device_manager.save_to_eeprom, unit_id)
     if success:
         return jsonify({
             'status': 'ok',
@@ -776,7 +873,9 @@ def api_change_unit_id(unit_id):
     if not new_unit_id or not (1 <= new_unit_id <= 247):
         return jsonify({'error': 'Invalid new_unit_id (must be 1..247)'}), 400
     
-    success = device_manager.write_unit_id_to_ram(unit_id, new_unit_id)
+    success = _bus_call(device_manager.write_unit_id_to_ram, unit_id, new_unit_id)
+    diagnostics_cache.pop(unit_id, None)
+    diagnostics_cache.pop(new_unit_id, None)
     if success:
         device = device_manager.get_device(new_unit_id)
         return jsonify({
@@ -814,7 +913,7 @@ def api_load_calibrate(unit_id):
     IR_MED_PESO_KG = 0x000C
 
     # Leer factor actual
-    regs = modbus_master.read_holding_registers(unit_id, HR_LOAD_CAL_FACTOR_DECI, 1)
+    regs = _bus_call(modbus_master.read_holding_registers, unit_id, HR_LOAD_CAL_FACTOR_DECI, 1)
     if not regs:
         return jsonify({'error': 'Failed to read current calibration factor'}), 503
     current_factor = regs[0] / 10.0
@@ -822,7 +921,7 @@ def api_load_calibrate(unit_id):
     # Leer medida actual (promedio implícito del firmware)
     import time as _t
     _t.sleep(0.25)
-    ir = modbus_master.read_input_registers(unit_id, IR_MED_PESO_KG, 1)
+    ir = _bus_call(modbus_master.read_input_registers, unit_id, IR_MED_PESO_KG, 1)
     if not ir:
         return jsonify({'error': 'Failed to read current load measurement'}), 503
     # int16 → signed
@@ -844,13 +943,13 @@ def api_load_calibrate(unit_id):
     new_factor_deci = int(round(new_factor * 10.0))
 
     # Escribir nuevo factor
-    ok = modbus_master.write_register(unit_id, HR_LOAD_CAL_FACTOR_DECI, new_factor_deci)
+    ok = _bus_call(modbus_master.write_register, unit_id, HR_LOAD_CAL_FACTOR_DECI, new_factor_deci)
     if not ok:
         return jsonify({'error': 'Failed to write new calibration factor'}), 500
 
     # Verificación rápida
     _t.sleep(0.3)
-    ir2 = modbus_master.read_input_registers(unit_id, IR_MED_PESO_KG, 1)
+    ir2 = _bus_call(modbus_master.read_input_registers, unit_id, IR_MED_PESO_KG, 1)
     if ir2:
         v2 = ir2[0] if ir2[0] < 32768 else ir2[0] - 65536
         measured2_kg = v2 / 100.0
@@ -874,7 +973,7 @@ def api_load_max100(unit_id):
     if not modbus_master:
         return jsonify({'error': 'Modbus client not initialized'}), 500
     IR_STAT_LOAD_MAX_KG = 0x001B
-    regs = modbus_master.read_input_registers(unit_id, IR_STAT_LOAD_MAX_KG, 1)
+    regs = _bus_call(modbus_master.read_input_registers, unit_id, IR_STAT_LOAD_MAX_KG, 1)
     if not regs:
         return jsonify({'error': 'Failed to read max-of-100 from device'}), 503
     # int16
@@ -901,21 +1000,28 @@ def api_diagnostics(unit_id):
     """
     from datetime import datetime
     
+    # Respuesta reciente en caché: no repetir las lecturas Modbus
+    cached = diagnostics_cache.get(unit_id)
+    if cached and time.monotonic() - cached[0] < Config.DIAGNOSTICS_CACHE_TTL_SEC:
+        return jsonify(cached[1])
+    
     try:
-        # Leer info básica
-        info = modbus_master.read_device_info(unit_id)
-        if not info:
-            logger.warning(f"No se pudo leer info de unit {unit_id}")
-            return jsonify({'error': f'Device {unit_id} not responding'}), 503
-        
-        # Leer estadísticas Modbus
-        diag = modbus_master.read_device_diagnostics(unit_id)
-        if not diag:
-            logger.warning(f"No se pudo leer diagnósticos de unit {unit_id}")
-            return jsonify({'error': f'Device {unit_id} diagnostic registers not available'}), 503
-        
-        # Leer quality flags
-        quality_flags = modbus_master.read_quality_flags(unit_id)
+        # Las tres lecturas con el bus en exclusiva (ver _bus_call)
+        with modbus_master.bus_lock:
+            # Leer info básica
+            info = modbus_master.read_device_info(unit_id)
+            if not info:
+                logger.warning(f"No se pudo leer info de unit {unit_id}")
+                return jsonify({'error': f'Device {unit_id} not responding'}), 503
+            
+            # Leer estadísticas Modbus
+            diag = modbus_master.read_device_diagnostics(unit_id)
+            if not diag:
+                logger.warning(f"No se pudo leer diagnósticos de unit {unit_id}")
+                return jsonify({'error': f'Device {unit_id} diagnostic registers not available'}), 503
+            
+            # Leer quality flags
+            quality_flags = modbus_master.read_quality_flags(unit_id)
         
         # Decodificar bitmasks
         capabilities = modbus_master.decode_capabilities(info['capabilities'])
@@ -952,6 +1058,7 @@ def api_diagnostics(unit_id):
             'timestamp': datetime.utcnow().isoformat() + 'Z'
         }
         
+        diagnostics_cache[unit_id] = (time.monotonic(), result)
         return jsonify(result)
     
     except Exception as e:
@@ -20,21 +20,28 @@ class Config:
     MODBUS_BAUDRATE = int(os.getenv('MODBUS_BAUDRATE', '115200'))
     MODBUS_TIMEOUT = float(os.getenv('MODBUS_TIMEOUT', '0.3'))  # Timeout normal para operaciones
     MODBUS_DISCOVERY_TIMEOUT = float(os.getenv('MODBUS_DISCOVERY_TIMEOUT', '0.08'))  # 80ms - Balance óptimo velocidad/robustez
+    MODBUS_RESPONSE_BUDGET_MS = int(os.getenv('MODBUS_RESPONSE_BUDGET_MS', '50'))  # Margen del esclavo en lecturas de telemetría (además del tiempo de trama)
     
     # Discovery
     DEVICE_UNIT_ID_MIN = int(os.getenv('DEVICE_UNIT_ID_MIN', '1'))
     DEVICE_UNIT_ID_MAX = int(os.getenv('DEVICE_UNIT_ID_MAX', '10'))
     DISCOVERY_RETRY_ON_FOUND = False  # No reintentar cuando se encuentre un dispositivo
     DISCOVERY_BATCH_SIZE = int(os.getenv('DISCOVERY_BATCH_SIZE', '20'))  # Escanear a lo sumo 20 unit IDs por tanda
+    DISCOVERY_MISS_TTL_SEC = float(os.getenv('DISCOVERY_MISS_TTL_SEC', '5.0'))  # UnitID sin respuesta: no se resondea durante este tiempo
+    DISCOVERY_MISS_TTL_MAX_SEC = float(os.getenv('DISCOVERY_MISS_TTL_MAX_SEC', '60.0'))  # Límite del TTL (se duplica en cada fallo)
     
     # Polling
     POLL_INTERVAL_SEC = float(os.getenv('POLL_INTERVAL_SEC', '2.0'))
     INTER_FRAME_DELAY_MS = int(os.getenv('INTER_FRAME_DELAY_MS', '15'))  # Aumentado a 15ms para dar margen al Micro (32U4)
     MAX_POLL_DEVICES = int(os.getenv('MAX_POLL_DEVICES', '20'))  # Máximo de dispositivos monitorizados simultáneamente
+    MAX_POLL_WORKERS = int(os.getenv('MAX_POLL_WORKERS', '2'))  # Workers de polling (el bus se usa de uno en uno)
     PER_DEVICE_REFRESH_SEC = float(os.getenv('PER_DEVICE_REFRESH_SEC', '1.0'))  # Objetivo de refresco por dispositivo
     OFFLINE_BACKOFF_SEC = float(os.getenv('OFFLINE_BACKOFF_SEC', '5.0'))  # Backoff base al marcar offline
     OFFLINE_BACKOFF_MAX_SEC = float(os.getenv('OFFLINE_BACKOFF_MAX_SEC', '60.0'))  # Límite superior backoff adaptativo
     
+    # Diagnóstico
+    DIAGNOSTICS_CACHE_TTL_SEC = float(os.getenv('DIAGNOSTICS_CACHE_TTL_SEC', '2.0'))  # Frescura de /api/diagnostics (0 = sin caché)
+    
     # Flask
     FLASK_HOST = os.getenv('FLASK_HOST', '0.0.0.0')
     FLASK_PORT = int(os.getenv('FLASK_PORT', '8080'))
@@ -28,7 +28,28 @@ Formato ASCII (alias, vendor, product):
 
 ============================================================================
 """
-from typing import Dict, Any
+from array import array
+from functools import lru_cache
+from operator import truediv
+from typing import Dict, Any, Tuple
+
+
+# Divisores de escala por registro (bloque IR con signo), aplicados con un único
+# map() en C en lugar de una división Python por campo
+_MPU_DIVISORS = (100.0, 100.0, 100.0) + (1000.0,) * 6  # IR[0..8]: cdeg, cdeg, c°C, mg×3, mdps×3
+_ACCEL_STATS_DIVISORS = (1000.0,) * 9  # IR[18..26]: mg → g
+
+
+@lru_cache(maxsize=64)
+def _capability_flags(capabilities: Tuple[str, ...]) -> Tuple[bool, bool, bool]:
+    """
+    Resuelve (has_mpu, has_load, has_wind) para un conjunto de capabilities.
+    
+    Cada dispositivo tiene un conjunto fijo de capabilities, así que el resultado
+    se calcula una vez por combinación y se reutiliza en cada trama.
+    """
+    caps = {c.lower() for c in capabilities}
+    return 'mpu6050' in caps, 'load' in caps, 'wind' in caps
 
 
 class DataNormalizer:
@@ -40,7 +61,7 @@ class DataNormalizer:
         Normaliza telemetría desde Input Registers (IR).
         
         Args:
-            raw_regs: Lista de 13 registros leídos desde IR addr=0x0000
+            raw_regs: Lista o array('H') de 12-13 registros leídos desde IR addr=0x0000 (12 si no hay Load)
                 [0] IR_MED_ANGULO_X_CDEG (int16, ×100 → °)
                 [1] IR_MED_ANGULO_Y_CDEG (int16, ×100 → °)
                 [2] IR_MED_TEMPERATURA_CENTI (int16, ×100 → °C)
@@ -59,42 +80,41 @@ class DataNormalizer:
         Returns:
             Dict con telemetría normalizada (solo campos de sensores habilitados)
         """
-        if len(raw_regs) < 13:
-            raise ValueError(f"Se esperan >=13 registros base, recibidos {len(raw_regs)}")
-        
-        # Conversión de uint16 a int16 (complemento a 2)
-        def to_int16(val: int) -> int:
-            return val if val < 32768 else val - 65536
+        if len(raw_regs) < 12:
+            raise ValueError(f"Se esperan >=12 registros base, recibidos {len(raw_regs)}")
         
-        # Conversión de 2× uint16 a uint32
-        def to_uint32(lo: int, hi: int) -> int:
-            return (hi << 16) | lo
+        # Conversión de todo el bloque uint16 → int16 (complemento a 2) en una sola operación:
+        # se reinterpretan los mismos bytes como enteros con signo (array 'H' → 'h').
+        # Si ya llega como array('H') (trama precompilada) basta una vista sin copia
+        if isinstance(raw_regs, array):
+            signed = memoryview(raw_regs).cast('B').cast('h')
+        else:
+            signed = array('h', array('H', raw_regs).tobytes())
         
-        # Normalizar capabilities para comparación case-insensitive
-        caps = [c.lower() for c in (capabilities or [])]
-        has_mpu = 'mpu6050' in caps
-        has_load = 'load' in caps
-        has_wind = 'wind' in caps
+        # Capabilities normalizadas (case-insensitive), cacheadas por combinación
+        has_mpu, has_load, has_wind = _capability_flags(tuple(capabilities or ()))
+        has_load = has_load and len(raw_regs) >= 13
         
         telemetry = {
-            'sample_count': to_uint32(raw_regs[9], raw_regs[10]),
+            'sample_count': (raw_regs[10] << 16) | raw_regs[9],  # uint32 (LSW + MSW)
             'quality_flags': raw_regs[11]
         }
         
         # Solo incluir datos de MPU6050 si tiene la capability
         if has_mpu:
-            telemetry['angle_x_deg'] = to_int16(raw_regs[0]) / 100.0
-            telemetry['angle_y_deg'] = to_int16(raw_regs[1]) / 100.0
-            telemetry['temperature_c'] = to_int16(raw_regs[2]) / 100.0
+            ax, ay, temp, acc_x, acc_y, acc_z, gyr_x, gyr_y, gyr_z = map(truediv, signed[0:9], _MPU_DIVISORS)
+            telemetry['angle_x_deg'] = ax
+            telemetry['angle_y_deg'] = ay
+            telemetry['temperature_c'] = temp
             telemetry['acceleration'] = {
-                'x_g': to_int16(raw_regs[3]) / 1000.0,
-                'y_g': to_int16(raw_regs[4]) / 1000.0,
-                'z_g': to_int16(raw_regs[5]) / 1000.0
+                'x_g': acc_x,
+                'y_g': acc_y,
+                'z_g': acc_z
             }
             telemetry['gyroscope'] = {
-                'x_dps': to_int16(raw_regs[6]) / 1000.0,
-                'y_dps': to_int16(raw_regs[7]) / 1000.0,
-                'z_dps': to_int16(raw_regs[8]) / 1000.0
+                'x_dps': gyr_x,
+                'y_dps': gyr_y,
+                'z_dps': gyr_z
             }
         
         # Solo incluir datos de Load si tiene la capability
@@ -102,8 +122,8 @@ class DataNormalizer:
             # Firmware almacena centi-kg (1 ckg = 10g): load_g / 10 → ckg
             # Para mostrar en gramos: ckg * 10 → g
             # Para mostrar en kg: ckg / 100 → kg
-            telemetry['load_g'] = to_int16(raw_regs[12]) * 10.0  # ckg → gramos
-            telemetry['load_kg'] = to_int16(raw_regs[12]) / 100.0  # ckg → kg
+            telemetry['load_g'] = signed[12] * 10.0  # ckg → gramos
+            telemetry['load_kg'] = signed[12] / 100.0  # ckg → kg
 
         # Ampliaciones opcionales (viento + estadísticas + carga) si el bloque incluye más registros.
         # Layout extendido (cuando se leen 28 registros):
@@ -140,34 +160,16 @@ class DataNormalizer:
         
         # Estadísticas de acelerómetro: solo si tiene MPU6050
         if has_mpu and len(raw_regs) >= 27:  # estadísticas acelerómetro completas
-            def mg_to_g(val: int) -> float:
-                return (val if val < 32768 else val - 65536) / 1000.0
-            accel_stats_regs = raw_regs[18:27]
-            
-            if len(accel_stats_regs) == 9:
-                x_min, x_max, x_avg, y_min, y_max, y_avg, z_min, z_max, z_avg = accel_stats_regs
-                telemetry['acceleration_stats'] = {
-                    'x_g': {
-                        'min': mg_to_g(x_min),
-                        'max': mg_to_g(x_max),
-                        'avg': mg_to_g(x_avg)
-                    },
-                    'y_g': {
-                        'min': mg_to_g(y_min),
-                        'max': mg_to_g(y_max),
-                        'avg': mg_to_g(y_avg)
-                    },
-                    'z_g': {
-                        'min': mg_to_g(z_min),
-                        'max': mg_to_g(z_max),
-                        'avg': mg_to_g(z_avg)
-                    }
-                }
+            x_min, x_max, x_avg, y_min, y_max, y_avg, z_min, z_max, z_avg = map(truediv, signed[18:27], _ACCEL_STATS_DIVISORS)
+            telemetry['acceleration_stats'] = {
+                'x_g': {'min': x_min, 'max': x_max, 'avg': x_avg},
+                'y_g': {'min': y_min, 'max': y_max, 'avg': y_avg},
+                'z_g': {'min': z_min, 'max': z_max, 'avg': z_avg}
+            }
         
         # Máximo de 100 muestras de carga (índice 27): solo si tiene capability Load
         if has_load and len(raw_regs) >= 28:
-            load_max_100_raw = raw_regs[27]
-            telemetry['load_max_100_kg'] = to_int16(load_max_100_raw) / 100.0
+            telemetry['load_max_100_kg'] = signed[27] / 100.0
         
         return telemetry
     
@@ -32,11 +32,17 @@ Tablas:
 ============================================================================
 """
 
+import csv
+import heapq
+import queue
 import sqlite3
-import os
+import threading
+from functools import lru_cache, partial
+from itertools import chain, count, groupby, islice, starmap
+from operator import itemgetter
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, Iterator, List, Optional, Any
 from contextlib import contextmanager
 from logger import logger
 
@@ -47,16 +53,60 @@ from logger import logger
 
 # Ruta de la base de datos (relativa al directorio edge/)
 DB_PATH = "edge_measurements.db"  # Se creará en edge/edge_measurements.db
+MEMORY_DB = ":memory:"  # BD en memoria (pruebas/benchmarks): sin E/S de disco
+
+# Cada Database(':memory:') usa su propia BD en memoria compartida entre sus conexiones
+_memory_db_ids = count(1)
 
 # Retención de datos (días)
 DEFAULT_RETENTION_DAYS = 2
 
+# PRAGMAs por conexión (no persisten en el fichero, se aplican en cada connect):
+# - synchronous=NORMAL: en WAL solo hace fsync en checkpoint; una caída del proceso
+#   no pierde datos, un corte de alimentación puede perder la última transacción
+# - temp_store=MEMORY: tablas/índices temporales en RAM
+# - mmap_size: lecturas vía mmap (256 MB) en lugar de read() por página
+# - cache_size: caché de páginas de hasta 64 MB (negativo = KiB; se reserva según se usa)
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+)
+
+# Sentencias preparadas que sqlite3 guarda por conexión (por defecto 128). Con la
+# conexión reutilizada por thread, cada INSERT/SELECT frecuente se compila una sola
+# vez; hay una sentencia INSERT por partición diaria y varias consultas de la API
+CACHED_STATEMENTS = 256
+
+# Conexiones libres que conserva cada Database para reutilizar entre threads. Flask
+# (async_mode='threading') atiende cada petición en un thread nuevo: sin pool, cada
+# petición abriría su conexión y repetiría los PRAGMAs
+CONNECTION_POOL_SIZE = 8
+
+# Inserción masiva con INSERT multi-fila (VALUES (...),(...),...): menos sentencias
+# que ejecutar que con executemany. Filas por sentencia: 64 × 6 parámetros = 384,
+# por debajo del límite de 999 variables de SQLite < 3.32. Mismo límite para IN (...)
+INSERT_ROWS_PER_STATEMENT = 64
+SQL_MAX_IN_PARAMS = 500
+
+# Particionado diario de medidas: una tabla measurements_YYYYMMDD por día.
+# El índice "caliente" de inserción es solo el del día en curso y la retención
+# se aplica con DROP TABLE en vez de DELETE + reconstrucción de índices.
+# La tabla measurements original se conserva (datos previos al particionado).
+LEGACY_MEASUREMENTS_TABLE = "measurements"
+PARTITION_PREFIX = "measurements_"
+PARTITION_GLOB = "measurements_[0-9]*"
+
+# Columnas comunes a measurements y sus particiones (orden fijo para UNION ALL)
+MEASUREMENT_COLUMNS = "id, timestamp, sensor_id, type, value, unit, quality, sent_to_cloud"
+
 
 # ============================================================================
 # INICIALIZACIÓN DE BASE DE DATOS
 # ============================================================================
 
-def init_db(db_path: str = DB_PATH) -> None:
+def init_db(db_path: str = DB_PATH, wal: bool = True) -> None:
     """
     Inicializa la base de datos SQLite con el esquema necesario para el Edge Layer.
     
@@ -84,23 +134,32 @@ def init_db(db_path: str = DB_PATH) -> None:
     
     Args:
         db_path: Ruta completa al archivo SQLite (default: /opt/edge/db/measurements.db)
+        wal: Si True activa el journal WAL; si False usa el journal clásico (DELETE),
+             útil cuando se quiere medir el tamaño del fichero .db sin ficheros -wal/-shm
     
     Raises:
         sqlite3.Error: Si hay error al crear la BD
         OSError: Si no se puede crear el directorio
     """
     
-    # 1. Crear directorio si no existe
-    db_dir = Path(db_path).parent
-    db_dir.mkdir(parents=True, exist_ok=True)
-    logger.info(f"📁 Directorio de BD verificado: {db_dir}")
+    # 1. Crear directorio si no existe (no aplica a URIs file:..., p.ej. BD en memoria)
+    is_uri = db_path.startswith('file:')
+    if not is_uri:
+        db_dir = Path(db_path).parent
+        db_dir.mkdir(parents=True, exist_ok=True)
+        logger.info(f"📁 Directorio de BD verificado: {db_dir}")
     
     # 2. Conectar a SQLite (crea el archivo si no existe)
-    conn = sqlite3.connect(db_path)
+    conn = sqlite3.connect(db_path, uri=is_uri)
     conn.row_factory = sqlite3.Row  # Acceso por nombre de columna
     cursor = conn.cursor()
     logger.info(f"🔌 Conexión abierta a BD: {db_path}")
     
+    # Modo WAL (persistente en el fichero): los commits no reescriben el journal
+    # completo y los lectores (API/dashboard) siguen leyendo mientras el polling escribe
+    journal_mode = cursor.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}").fetchone()[0]
+    logger.info(f"📝 Journal mode de BD: {journal_mode}")
+    
     try:
         # ====================================================================
         # TABLA: devices
@@ -129,6 +188,17 @@ def init_db(db_path: str = DB_PATH) -> None:
         """)
         logger.info("✅ Tabla 'devices' creada/verificada")
         
+        # Vista de presentación: capabilities ya como texto "MPU6050,Wind,Load" (caps_csv)
+        # para listados y herramientas de consola, sin json.loads por dispositivo
+        cursor.execute("""
+            CREATE VIEW IF NOT EXISTS devices_view AS
+            SELECT unit_id, alias, rig_id, enabled, last_seen,
+                   replace(replace(replace(replace(capabilities, '[', ''), ']', ''), '"', ''), ' ', '')
+                       AS caps_csv
+            FROM devices
+        """)
+        logger.info("✅ Vista 'devices_view' creada/verificada")
+        
         # ====================================================================
         # TABLA: sensors
         # ====================================================================
@@ -188,20 +258,25 @@ def init_db(db_path: str = DB_PATH) -> None:
         
         # Índices para optimizar consultas frecuentes:
         # - idx_measurements_timestamp: Consultas por rango de tiempo
-        # - idx_measurements_sensor_id: Consultas por sensor específico
-        # - idx_measurements_sent: Bridge ThingsBoard busca sent_to_cloud=0
+        # - idx_measurements_sensor_ts: Consultas por sensor ordenadas por tiempo
+        #   (get_measurements con LIMIT N, última medida por sensor); SQLite lo
+        #   recorre hacia atrás para ORDER BY timestamp DESC
+        # - idx_measurements_sent_ts: Bridge ThingsBoard busca sent_to_cloud=0 por orden de timestamp
+        # (sustituyen a los antiguos idx_measurements_sensor_id / idx_measurements_sent)
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_measurements_timestamp 
             ON measurements(timestamp)
         """)
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_measurements_sensor_id 
-            ON measurements(sensor_id)
+            CREATE INDEX IF NOT EXISTS idx_measurements_sensor_ts 
+            ON measurements(sensor_id, timestamp)
         """)
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_measurements_sent 
-            ON measurements(sent_to_cloud)
+            CREATE INDEX IF NOT EXISTS idx_measurements_sent_ts 
+            ON measurements(sent_to_cloud, timestamp)
         """)
+        cursor.execute("DROP INDEX IF EXISTS idx_measurements_sensor_id")
+        cursor.execute("DROP INDEX IF EXISTS idx_measurements_sent")
         logger.info("✅ Índices de 'measurements' creados/verificados")
         
         # Índice para sensors por unit_id (consultas de sensores de un dispositivo)
@@ -264,39 +339,375 @@ def init_db(db_path: str = DB_PATH) -> None:
         logger.info("🔌 Conexión a BD cerrada")
 
 
+# ============================================================================
+# PARTICIONES DIARIAS DE MEASUREMENTS
+# ============================================================================
+
+def _utc_iso_now() -> str:
+    """Instante actual en el formato de timestamp de la BD (ISO8601 UTC con 'Z')"""
+    return datetime.utcnow().isoformat() + 'Z'
+
+
+def partition_for(timestamp: str) -> str:
+    """
+    Tabla de medidas correspondiente a un timestamp ISO8601.
+    
+    El día se toma del propio texto ("2025-12-03T10:15:30Z" → measurements_20251203),
+    así que es coherente con las comparaciones de texto de las consultas.
+    Timestamps sin formato de fecha reconocible van a la tabla original.
+    """
+    day = timestamp[:4] + timestamp[5:7] + timestamp[8:10]
+    if len(day) == 8 and day.isdigit():
+        return PARTITION_PREFIX + day
+    return LEGACY_MEASUREMENTS_TABLE
+
+
+def _list_partitions(cursor: sqlite3.Cursor) -> List[str]:
+    """Particiones diarias existentes, ordenadas de la más antigua a la más reciente"""
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB ? ORDER BY name",
+        (PARTITION_GLOB,)
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+@lru_cache(maxsize=64)
+def _insert_measurement_sql(table: str, rows: int = 1) -> str:
+    """
+    Texto del INSERT de medidas para una tabla (rows grupos VALUES por sentencia).
+    
+    Siempre el mismo string por tabla y tamaño: insert_measurement_row y
+    flush_measurements comparten la sentencia ya compilada en la caché de la
+    conexión. Supone un esquema de columnas estable durante la vida del proceso
+    (init_db lo fija al arrancar).
+    """
+    return (
+        f"INSERT INTO {table} (timestamp, sensor_id, type, value, unit, quality, sent_to_cloud) "
+        "VALUES " + ", ".join(["(?, ?, ?, ?, ?, ?, 0)"] * rows)
+    )
+
+
+def _chunked(iterable: Iterable, n: int) -> Iterable[list]:
+    """Trocea un iterable en listas de n elementos (la última puede ser más corta)"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, n))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _seed_measurement_sequence(cursor: sqlite3.Cursor, table: str) -> None:
+    """
+    Ajusta el contador AUTOINCREMENT de una tabla de medidas al máximo global.
+    
+    Cada tabla (original y particiones diarias) lleva su propio contador en
+    sqlite_sequence; si se inserta en una partición antigua (lote de las 23:59 que
+    llega tras crear la del día siguiente, bulk_load sobre un día existente) su
+    contador repetiría id ya usados en otra. Llamado dentro de la transacción del
+    INSERT, justo antes, hace que los id salgan de una única secuencia global y
+    sean únicos entre tablas (mark_as_sent() identifica medidas solo por id).
+    """
+    params = (LEGACY_MEASUREMENTS_TABLE, PARTITION_GLOB, table)
+    cursor.execute("""
+        UPDATE sqlite_sequence
+        SET seq = (SELECT MAX(seq) FROM sqlite_sequence WHERE name = ? OR name GLOB ?)
+        WHERE name = ?
+    """, params)
+    if cursor.rowcount == 0:
+        # Tabla aún sin fila en sqlite_sequence (nunca ha recibido inserciones)
+        cursor.execute("""
+            INSERT INTO sqlite_sequence (name, seq)
+            SELECT ?3, MAX(seq) FROM sqlite_sequence WHERE name = ?1 OR name GLOB ?2
+            HAVING MAX(seq) IS NOT NULL
+        """, params)
+
+
+def _insert_measurement_rows(cursor: sqlite3.Cursor, table: str, rows: Iterable[tuple]) -> int:
+    """
+    Inserta filas posicionales en una tabla de medidas.
+    
+    Los bloques completos de INSERT_ROWS_PER_STATEMENT filas van en un único INSERT
+    multi-fila; el resto (menos de un bloque) con executemany sobre el INSERT de una
+    fila, para no compilar una sentencia distinta por cada tamaño de resto. Los id
+    salen de la secuencia global (ver _seed_measurement_sequence).
+    
+    Returns:
+        Número de filas insertadas
+    """
+    _seed_measurement_sequence(cursor, table)
+    inserted = 0
+    for chunk in _chunked(rows, INSERT_ROWS_PER_STATEMENT):
+        if len(chunk) == INSERT_ROWS_PER_STATEMENT:
+            cursor.execute(
+                _insert_measurement_sql(table, INSERT_ROWS_PER_STATEMENT),
+                list(chain.from_iterable(chunk))
+            )
+        else:
+            cursor.executemany(_insert_measurement_sql(table), chunk)
+        inserted += len(chunk)
+    return inserted
+
+
+def _union_measurements_sql(tables: List[str], where: str = "") -> str:
+    """SELECT ... UNION ALL sobre varias tablas de medidas (mismo filtro en cada una)"""
+    return " UNION ALL ".join(
+        f"SELECT {MEASUREMENT_COLUMNS} FROM {table}{where}" for table in tables
+    )
+
+
+@lru_cache(maxsize=256)
+def _latest_per_sensor_sql(table: str, since: bool = False) -> str:
+    """
+    Última medida de cada sensor de una tabla, guiada por el índice (sensor_id, timestamp).
+    
+    Los sensor_id distintos se recorren con un CTE recursivo (cada paso es un
+    salto en el índice, sin leer todas las filas) y para cada uno se toma la
+    fila más reciente con ORDER BY timestamp DESC LIMIT 1.
+    """
+    since_filter = " AND timestamp >= ?" if since else ""
+    return f"""
+        WITH RECURSIVE ids(sid) AS (
+            SELECT MIN(sensor_id) FROM {table}
+            UNION ALL
+            SELECT (SELECT MIN(sensor_id) FROM {table} WHERE sensor_id > sid)
+            FROM ids WHERE sid IS NOT NULL
+        )
+        SELECT {MEASUREMENT_COLUMNS} FROM {table} WHERE id IN (
+            SELECT (SELECT id FROM {table}
+                    WHERE sensor_id = sid{since_filter}
+                    ORDER BY timestamp DESC LIMIT 1)
+            FROM ids WHERE sid IS NOT NULL
+        )
+    """
+
+
+def _create_partition_indexes(cursor: sqlite3.Cursor, table: str) -> None:
+    """
+    Índices de una partición diaria: por tiempo, por sensor+tiempo (consultas
+    por sensor con LIMIT) y pendientes de envío por orden de timestamp.
+    """
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_timestamp ON {table}(timestamp)")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_sensor_ts ON {table}(sensor_id, timestamp)")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_sent_ts ON {table}(sent_to_cloud, timestamp)")
+
+
+def _drop_table_indexes(cursor: sqlite3.Cursor, table: str) -> None:
+    """Elimina los índices explícitos de una tabla (no los automáticos de PRIMARY KEY/UNIQUE)"""
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,)
+    )
+    for (name,) in cursor.fetchall():
+        cursor.execute(f"DROP INDEX {name}")
+
+
+def _create_partition(cursor: sqlite3.Cursor, table: str) -> None:
+    """
+    Crea una partición diaria (idempotente, dentro de la transacción en curso).
+    
+    Los id de la nueva tabla continúan la secuencia global de medidas: cada
+    INSERT reajusta antes su contador (ver _seed_measurement_sequence).
+    """
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            sensor_id TEXT NOT NULL,
+            type TEXT NOT NULL,
+            value REAL NOT NULL,
+            unit TEXT NOT NULL,
+            quality TEXT NOT NULL DEFAULT 'OK',
+            sent_to_cloud INTEGER NOT NULL DEFAULT 0,
+            
+            FOREIGN KEY (sensor_id) REFERENCES sensors(sensor_id),
+            CHECK (quality IN ('OK', 'WARN', 'ALARM', 'ERROR_COMMS')),
+            CHECK (sent_to_cloud IN (0, 1))
+        )
+    """)
+    _create_partition_indexes(cursor, table)
+
+
 # ============================================================================
 # CLASE DATABASE - API DE ACCESO A DATOS
 # ============================================================================
 
+class _TransactionConnection:
+    """
+    Conexión entregada a los métodos de Database dentro de Database.transaction():
+    sus commit()/rollback() no hacen nada, el cierre lo decide la transacción externa.
+    """
+    __slots__ = ('_conn',)
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
 class Database:
     """
     Gestor de base de datos SQLite para el Edge Layer.
     Provee métodos CRUD para sensors, measurements, alerts.
     """
     
-    def __init__(self, db_path: str = DB_PATH):
+    def __init__(self, db_path: str = DB_PATH, wal: bool = True, foreign_keys: bool = False):
         """
         Inicializa el gestor de BD.
         
         Args:
             db_path: Ruta al archivo SQLite
+            wal: Journal WAL (True) o clásico (False), ver init_db()
+            foreign_keys: Si True, cada conexión aplica PRAGMA foreign_keys=ON y SQLite
+                rechaza medidas/alertas de sensores no registrados. Desactivado por defecto:
+                con él activo, un sensor_id sin alta en 'sensors' haría fallar el lote entero
+                de medidas del ciclo de polling
         """
         self.db_path = db_path
+        self._connect_target = db_path
+        self._memory_anchor = None
+        if db_path == MEMORY_DB:
+            # ':memory:' daría una BD vacía distinta en cada conexión (init_db, cada thread):
+            # se usa una BD en memoria con nombre y caché compartida, que vive mientras
+            # la conexión ancla siga abierta (tanto como esta instancia)
+            self._connect_target = f"file:edge_memdb_{next(_memory_db_ids)}?mode=memory&cache=shared"
+            self._memory_anchor = sqlite3.connect(
+                self._connect_target, uri=True, check_same_thread=False
+            )
+        # Una conexión por thread, tomada del pool (o abierta) la primera vez y reutilizada
+        # después; release() la devuelve al pool al terminar el thread/petición.
+        # LIFO: se reutiliza primero la conexión más reciente (caché de páginas caliente)
+        self._local = threading.local()
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=CONNECTION_POOL_SIZE)
+        self._connection_pragmas = CONNECTION_PRAGMAS + (
+            ("PRAGMA foreign_keys=ON",) if foreign_keys else ()
+        )
         
         # Asegurar que el esquema esté creado
-        init_db(self.db_path)
+        init_db(self._connect_target, wal=wal)
+        
+        # Particiones diarias ya creadas (evita consultar sqlite_master en cada inserción)
+        with self._get_connection() as conn:
+            self._partitions = set(_list_partitions(conn.cursor()))
+        # Lista de particiones para las lecturas: (schema_version, particiones)
+        self._read_partitions = (None, [])
         
         logger.info(f"✅ Database inicializado: {self.db_path}")
     
+    def _connection(self) -> sqlite3.Connection:
+        """Conexión SQLite del thread actual (del pool, o nueva y configurada una sola vez)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                # check_same_thread=False: la conexión pasa de un thread a otro vía pool,
+                # pero solo la usa el thread que la tiene asignada en cada momento
+                conn = sqlite3.connect(
+                    self._connect_target, uri=self._memory_anchor is not None,
+                    cached_statements=CACHED_STATEMENTS, check_same_thread=False
+                )
+                conn.row_factory = sqlite3.Row
+                for pragma in self._connection_pragmas:
+                    conn.execute(pragma)
+            self._local.conn = conn
+            self._local.depth = 0
+        return conn
+    
     @contextmanager
     def _get_connection(self):
-        """Context manager para conexiones SQLite"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """
+        Context manager para conexiones SQLite.
+        
+        Reutiliza la conexión del thread (sin open/close ni PRAGMAs por llamada).
+        Lo que quede sin commit al salir se descarta, igual que al cerrar una
+        conexión. Dentro de transaction() el commit lo hace la transacción.
+        """
+        conn = self._connection()
+        if self._local.depth:
+            yield _TransactionConnection(conn)
+            return
         try:
             yield conn
         finally:
+            if conn.in_transaction:
+                conn.rollback()
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Agrupa varias operaciones de la API en una sola transacción (BEGIN IMMEDIATE ... COMMIT).
+        
+        Para ingestas fila a fila (scripts, CLI): un único commit por lote en lugar
+        de uno por llamada. Si hay una excepción se deshace todo el bloque. Las
+        transacciones anidadas se integran en la externa. No usar cleanup_old_data()
+        dentro (VACUUM no puede ejecutarse en una transacción).
+        
+        Example:
+            with db.transaction():
+                for m in measurements:
+                    db.insert_measurement(m)
+        """
+        local = self._local
+        conn = self._connection()
+        if local.depth:
+            local.depth += 1
+            try:
+                yield self
+            finally:
+                local.depth -= 1
+            return
+        
+        conn.execute("BEGIN IMMEDIATE")
+        local.depth = 1
+        try:
+            yield self
+        except BaseException:
+            local.depth = 0
+            conn.rollback()
+            # Las particiones creadas dentro de la transacción ya no existen
+            self._partitions = set(_list_partitions(conn.cursor()))
+            raise
+        local.depth = 0
+        conn.commit()
+    
+    def release(self):
+        """
+        Devuelve la conexión del thread actual al pool (fin de petición HTTP).
+        
+        Lo que quede sin commit se descarta. Si el pool está lleno la conexión se
+        cierra. No hace nada dentro de transaction() ni si el thread no tiene conexión.
+        """
+        local = self._local
+        conn = getattr(local, 'conn', None)
+        if conn is None or local.depth:
+            return
+        local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+    
+    def close(self):
+        """Cierra la conexión del thread actual y las del pool (se reabrirán si se vuelve a usar)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
             conn.close()
+            self._local.conn = None
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
     
     # ========================================================================
     # OPERACIONES CON DEVICES
@@ -565,10 +976,65 @@ class Database:
                 """, (unit_id,))
             return [dict(row) for row in cursor.fetchall()]
     
+    def get_all_sensors_grouped(self, enabled_only: bool = True) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Obtiene todos los sensores agrupados por dispositivo con una sola consulta.
+        
+        Sustituye a llamar a get_sensors_by_device() una vez por dispositivo.
+        
+        Args:
+            enabled_only: Si True, solo sensores con enabled=1
+        
+        Returns:
+            Dict {unit_id: lista de sensores ordenada por sensor_id}
+        """
+        grouped: Dict[int, List[Dict[str, Any]]] = {}
+        for sensor in self.get_all_sensors(enabled_only):
+            grouped.setdefault(sensor['unit_id'], []).append(sensor)
+        return grouped
+    
     # ========================================================================
     # OPERACIONES CON MEASUREMENTS
     # ========================================================================
     
+    def _ensure_partition(self, cursor: sqlite3.Cursor, table: str) -> bool:
+        """
+        Crea la partición si aún no existe.
+        
+        Returns:
+            True si se ha creado en esta transacción (se registra en
+            self._partitions solo tras el commit)
+        """
+        if table == LEGACY_MEASUREMENTS_TABLE or table in self._partitions:
+            return False
+        _create_partition(cursor, table)
+        logger.info(f"🗂️ Partición de medidas creada: {table}")
+        return True
+    
+    def _measurement_tables(self, cursor: sqlite3.Cursor, since: Optional[str] = None) -> List[str]:
+        """
+        Tablas de medidas a consultar: la original más las particiones diarias.
+        
+        Args:
+            since: Timestamp ISO8601; descarta las particiones de días anteriores
+        
+        La lista se reutiliza mientras no cambie PRAGMA schema_version (cualquier
+        CREATE/DROP lo incrementa, también desde otros procesos): en la consulta
+        de la última medida, leer sqlite_master costaba más que la propia lectura.
+        No se cachea dentro de una transacción (podría tener DDL sin confirmar).
+        """
+        version = cursor.execute("PRAGMA schema_version").fetchone()[0]
+        cached_version, partitions = self._read_partitions
+        if version != cached_version:
+            partitions = _list_partitions(cursor)
+            if not cursor.connection.in_transaction:
+                self._read_partitions = (version, partitions)
+        if since:
+            first = partition_for(since)
+            if first != LEGACY_MEASUREMENTS_TABLE:
+                partitions = [table for table in partitions if table >= first]
+        return [LEGACY_MEASUREMENTS_TABLE] + partitions
+    
     def insert_measurement(self, measurement: Dict[str, Any]) -> int:
         """
         Inserta una medida de telemetría.
@@ -594,27 +1060,201 @@ class Database:
                 'quality': 'OK'
             })
         """
-        timestamp = measurement.get('timestamp', datetime.utcnow())
-        if isinstance(timestamp, datetime):
-            timestamp = timestamp.isoformat() + 'Z'
+        return self.insert_measurement_row(
+            measurement['sensor_id'], measurement['type'], measurement['value'],
+            measurement['unit'], measurement.get('quality', 'OK'), measurement.get('timestamp')
+        )
+
+    def insert_measurement_row(
+        self, sensor_id: str, type_: str, value: float, unit: str,
+        quality: str = 'OK', timestamp: Optional[Any] = None
+    ) -> int:
+        """
+        Inserta una medida a partir de argumentos posicionales (sin dict intermedio).
+        
+        Args:
+            sensor_id, type_, value, unit, quality: Como en insert_measurement()
+            timestamp: datetime o string ISO8601 (None = datetime.utcnow())
         
+        Returns:
+            ID del registro insertado
+        """
+        row = self._row(sensor_id, type_, value, unit, quality, timestamp)
+        table = partition_for(row[0])
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO measurements (
-                    timestamp, sensor_id, type, value, unit, quality, sent_to_cloud
-                ) VALUES (?, ?, ?, ?, ?, ?, 0)
-            """, (
-                timestamp,
-                measurement['sensor_id'],
-                measurement['type'],
-                measurement['value'],
-                measurement['unit'],
-                measurement.get('quality', 'OK')
-            ))
+            created = self._ensure_partition(cursor, table)
+            _seed_measurement_sequence(cursor, table)
+            cursor.execute(_insert_measurement_sql(table), row)
             conn.commit()
+            if created:
+                self._partitions.add(table)
             return cursor.lastrowid
-    
+
+    def insert_measurements_batch(self, measurements: Iterable[Dict[str, Any]]) -> int:
+        """
+        Inserta varias medidas en una única transacción.
+
+        Pensado para el PollingService y cualquier ingesta de varias filas
+        (scripts, pruebas): todas las medidas se escriben con un solo
+        executemany + commit en lugar de una conexión y commit por fila.
+        Las tuplas se generan al vuelo, sin lista intermedia.
+
+        Args:
+            measurements: Dicts con el mismo formato que insert_measurement()
+
+        Returns:
+            Número de registros insertados
+        """
+        now = _utc_iso_now()
+        return self.flush_measurements(map(partial(self._measurement_row, now=now), measurements))
+
+    def insert_measurement_rows(self, rows: Iterable[tuple]) -> int:
+        """
+        Inserta varias medidas dadas como tuplas en una única transacción.
+
+        Variante posicional de insert_measurements_batch() para ingestas de
+        scripts y pruebas: sin un dict por fila.
+
+        Args:
+            rows: Tuplas (sensor_id, type, value, unit, quality, timestamp);
+                  quality y timestamp pueden omitirse como en insert_measurement_row().
+                  Para lotes grandes conviene pasar el timestamp ya como string ISO
+                  (formateado una vez fuera del bucle) en lugar de un datetime por fila
+
+        Returns:
+            Número de registros insertados
+        """
+        now = _utc_iso_now()
+        return self.flush_measurements(starmap(partial(self._row, now=now), rows))
+
+    @staticmethod
+    def _row(sensor_id: str, type_: str, value: float, unit: str,
+             quality: str = 'OK', timestamp: Optional[Any] = None,
+             now: Optional[str] = None) -> tuple:
+        """
+        Tupla posicional del INSERT (timestamp, sensor_id, type, value, unit, quality).
+        
+        Las filas sin timestamp de un mismo lote comparten now (formateado una vez
+        por lote); los strings ISO se usan tal cual, sin conversión.
+        """
+        if timestamp is None:
+            timestamp = now or _utc_iso_now()
+        elif type(timestamp) is not str:
+            timestamp = timestamp.isoformat() + 'Z'
+        return (timestamp, sensor_id, type_, value, unit, quality)
+
+    @classmethod
+    def _measurement_row(cls, measurement: Dict[str, Any], now: Optional[str] = None) -> tuple:
+        """Convierte un dict de medida en la tupla posicional del INSERT"""
+        return cls._row(
+            measurement['sensor_id'], measurement['type'], measurement['value'],
+            measurement['unit'], measurement.get('quality', 'OK'), measurement.get('timestamp'),
+            now
+        )
+
+    def flush_measurements(self, rows: Iterable[tuple]) -> int:
+        """
+        Inserta un bloque de medidas ya en formato posicional.
+
+        Ruta de ingesta masiva usada por el PollingService al final de cada
+        ciclo: todas las filas en la misma transacción, en INSERT multi-fila
+        por bloques y executemany para el resto (ver _insert_measurement_rows).
+        Acepta cualquier iterable (p.ej. zip() sobre columnas), sin materializar
+        una lista intermedia. Las filas se reparten por partición diaria según
+        su timestamp (normalmente un único grupo; dos si el lote cruza medianoche).
+
+        Args:
+            rows: Tuplas (timestamp, sensor_id, type, value, unit, quality)
+
+        Returns:
+            Número de registros insertados
+        """
+        inserted = 0
+        created = []
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                for table, group in groupby(rows, key=lambda row: partition_for(row[0])):
+                    if self._ensure_partition(cursor, table):
+                        created.append(table)
+                    inserted += _insert_measurement_rows(cursor, table, group)
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+            self._partitions.update(created)
+            return inserted
+
+    def bulk_load(self, rows: Iterable[tuple]) -> int:
+        """
+        Importación masiva de medidas (restauraciones, migraciones, datos de prueba).
+        
+        Como flush_measurements(), pero en cada partición diaria afectada se
+        eliminan los índices antes de insertar y se recrean al final, dentro de
+        la misma transacción: construir un índice de una vez es más barato que
+        mantenerlo fila a fila. No usar para el polling normal (lotes pequeños
+        sobre particiones con muchos datos: recrear el índice costaría más).
+        
+        Args:
+            rows: Tuplas (timestamp, sensor_id, type, value, unit, quality),
+                  idealmente ordenadas por timestamp
+        
+        Returns:
+            Número de registros insertados
+        """
+        inserted = 0
+        created = []
+        reindex = []
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                for table, group in groupby(rows, key=lambda row: partition_for(row[0])):
+                    if self._ensure_partition(cursor, table):
+                        created.append(table)
+                    if table != LEGACY_MEASUREMENTS_TABLE and table not in reindex:
+                        _drop_table_indexes(cursor, table)
+                        reindex.append(table)
+                    inserted += _insert_measurement_rows(cursor, table, group)
+                for table in reindex:
+                    _create_partition_indexes(cursor, table)
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+            self._partitions.update(created)
+            logger.info(f"📥 Carga masiva: {inserted} medidas en {len(reindex)} particiones")
+            return inserted
+
+    def import_measurements_csv(self, path: str) -> int:
+        """
+        Importa medidas desde un CSV (p.ej. un volcado de sincronización con la nube).
+        
+        El fichero se lee en streaming con el lector csv (implementado en C) y las
+        filas van a bulk_load(): índices fuera durante la carga e INSERT multi-fila,
+        todo en una transacción. No requiere la extensión de tabla virtual CSV de
+        SQLite, que no está disponible en el sqlite3 de Python por defecto.
+        
+        Formato: cabecera con al menos timestamp, sensor_id, type, value, unit
+        (quality opcional, 'OK' por defecto); timestamps ISO8601, idealmente ordenados.
+        
+        Args:
+            path: Ruta al fichero CSV
+        
+        Returns:
+            Número de registros insertados
+        """
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            rows = (
+                self._row(
+                    rec['sensor_id'], rec['type'], float(rec['value']), rec['unit'],
+                    rec.get('quality') or 'OK', rec['timestamp'] or None
+                )
+                for rec in reader
+            )
+            return self.bulk_load(rows)
+
     def get_measurements(
         self, 
         sensor_id: Optional[str] = None,
@@ -632,26 +1272,139 @@ class Database:
         Returns:
             Lista de medidas (más recientes primero)
         """
+        return [dict(row) for row in self.stream_measurements(sensor_id, since, limit)]
+    
+    def stream_measurements(
+        self,
+        sensor_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        limit: Optional[int] = None,
+        batch_size: int = 1000
+    ) -> Iterator[sqlite3.Row]:
+        """
+        Recorre medidas como generador de sqlite3.Row (más recientes primero).
+        
+        Para consultas grandes (exportación, sincronización): las filas se leen
+        por páginas (ver _iter_measurement_table) y no se construye un dict por
+        fila ni la lista completa. Las Row se indexan por nombre igual que los dicts.
+        Entre filas no queda ningún cursor abierto en la conexión del thread.
+        
+        Args:
+            sensor_id: Filtrar por sensor (opcional)
+            since: Timestamp desde (opcional)
+            limit: Máximo número de registros (None = sin límite)
+            batch_size: Filas por página (consulta) de cada tabla
+        
+        Yields:
+            sqlite3.Row con las columnas de MEASUREMENT_COLUMNS
+        """
+        if limit is not None and limit <= 0:
+            return
+        
+        where = " WHERE 1=1"
+        params = []
+        since_str = None
+        
+        if sensor_id:
+            where += " AND sensor_id = ?"
+            params.append(sensor_id)
+        
+        if since:
+            since_str = since.isoformat() + 'Z'
+            where += " AND timestamp >= ?"
+            params.append(since_str)
+        
+        with self._get_connection() as conn:
+            tables = self._measurement_tables(conn.cursor(), since_str)
+        
+        # Particiones de la más reciente a la más antigua: cada día contiene solo
+        # timestamps de ese día, así que encadenarlas ya da el orden global. La
+        # tabla original (timestamps arbitrarios) se intercala con heapq.merge.
+        # Con limit, solo se leen las páginas necesarias de las tablas necesarias
+        page = batch_size if limit is None else min(batch_size, limit)
+        partitions = chain.from_iterable(
+            self._iter_measurement_table(table, where, params, page)
+            for table in reversed(tables[1:])
+        )
+        legacy = self._iter_measurement_table(tables[0], where, params, page)
+        rows = heapq.merge(partitions, legacy, key=itemgetter('timestamp', 'id'), reverse=True)
+        yield from (rows if limit is None else islice(rows, limit))
+    
+    def _iter_measurement_table(
+        self, table: str, where: str, params: List[Any], page: int
+    ) -> Iterator[sqlite3.Row]:
+        """
+        Filas de una tabla de medidas (más recientes primero) por páginas keyset.
+        
+        Cada página es una consulta completa (fetchall) que continúa tras la
+        última fila devuelta ((timestamp, id) < ...): entre yields no queda
+        ningún cursor abierto, así que el consumidor puede tardar lo que quiera
+        sin fijar una instantánea de lectura del WAL (que bloquearía los
+        checkpoints) y el mismo thread puede escribir con su conexión.
+        
+        Args:
+            table: Tabla de medidas
+            where: Filtro " WHERE ..." (no vacío) común a todas las páginas
+            params: Parámetros de where
+            page: Filas por consulta
+        """
+        order_limit = " ORDER BY timestamp DESC, id DESC LIMIT ?"
+        first_sql = f"SELECT {MEASUREMENT_COLUMNS} FROM {table}{where}{order_limit}"
+        next_sql = f"SELECT {MEASUREMENT_COLUMNS} FROM {table}{where} AND (timestamp, id) < (?, ?){order_limit}"
+        rows = None
+        while True:
+            with self._get_connection() as conn:
+                try:
+                    if rows is None:
+                        rows = conn.execute(first_sql, (*params, page)).fetchall()
+                    else:
+                        last = rows[-1]
+                        rows = conn.execute(
+                            next_sql, (*params, last['timestamp'], last['id'], page)
+                        ).fetchall()
+                except sqlite3.OperationalError:
+                    # Partición eliminada por la retención a mitad del recorrido
+                    if not table.startswith(PARTITION_PREFIX) or table in _list_partitions(conn.cursor()):
+                        raise
+                    return
+            yield from rows
+            if len(rows) < page:
+                return
+    
+    def get_latest_measurement_per_sensor(
+        self, since: Optional[datetime] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Última medida de cada sensor en una sola consulta.
+        
+        Sustituye al patrón N+1 de llamar a get_measurements(sensor_id=..., limit=1)
+        por cada sensor: en cada tabla de medidas, un salto en el índice
+        (sensor_id, timestamp) por sensor (ver _latest_per_sensor_sql), sin
+        recorrer ni ordenar todas las filas. Gana la medida más reciente.
+        
+        Args:
+            since: Ignorar medidas anteriores (opcional)
+        
+        Returns:
+            Dict {sensor_id: medida} (mismo formato que get_measurements())
+        """
         with self._get_connection() as conn:
             cursor = conn.cursor()
             
-            query = "SELECT * FROM measurements WHERE 1=1"
             params = []
-            
-            if sensor_id:
-                query += " AND sensor_id = ?"
-                params.append(sensor_id)
-            
+            since_str = None
             if since:
                 since_str = since.isoformat() + 'Z'
-                query += " AND timestamp >= ?"
                 params.append(since_str)
             
-            query += " ORDER BY timestamp DESC LIMIT ?"
-            params.append(limit)
-            
-            cursor.execute(query, params)
-            return [dict(row) for row in cursor.fetchall()]
+            latest = {}
+            for table in self._measurement_tables(cursor, since_str):
+                cursor.execute(_latest_per_sensor_sql(table, since_str is not None), params)
+                for row in cursor.fetchall():
+                    current = latest.get(row['sensor_id'])
+                    if current is None or row['timestamp'] > current['timestamp']:
+                        latest[row['sensor_id']] = row
+            return {sensor_id: dict(row) for sensor_id, row in latest.items()}
     
     def mark_as_sent(self, measurement_ids: List[int]) -> None:
         """
@@ -662,12 +1415,17 @@ class Database:
         """
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            placeholders = ','.join('?' * len(measurement_ids))
-            cursor.execute(f"""
-                UPDATE measurements 
-                SET sent_to_cloud = 1 
-                WHERE id IN ({placeholders})
-            """, measurement_ids)
+            tables = self._measurement_tables(cursor)
+            # Un UPDATE ... IN (...) por bloque de ids (límite de variables de SQLite)
+            for ids in _chunked(measurement_ids, SQL_MAX_IN_PARAMS):
+                placeholders = ','.join('?' * len(ids))
+                # Los id son únicos entre particiones (ver _seed_measurement_sequence)
+                for table in tables:
+                    cursor.execute(f"""
+                        UPDATE {table} 
+                        SET sent_to_cloud = 1 
+                        WHERE id IN ({placeholders})
+                    """, ids)
             conn.commit()
             logger.debug(f"Marcadas {len(measurement_ids)} medidas como enviadas")
     
@@ -683,12 +1441,12 @@ class Database:
         """
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT * FROM measurements 
-                WHERE sent_to_cloud = 0 
-                ORDER BY timestamp ASC 
-                LIMIT ?
-            """, (limit,))
+            tables = self._measurement_tables(cursor)
+            cursor.execute(
+                _union_measurements_sql(tables, " WHERE sent_to_cloud = 0")
+                + " ORDER BY timestamp ASC LIMIT ?",
+                (limit,)
+            )
             return [dict(row) for row in cursor.fetchall()]
     
     # ========================================================================
@@ -799,6 +1557,10 @@ class Database:
         """
         Elimina medidas antiguas para liberar espacio.
         
+        Las particiones diarias completas anteriores al día de corte se eliminan
+        con DROP TABLE (granularidad de un día); en la tabla original se borran
+        las filas una a una como antes.
+        
         Args:
             days: Retención en días (elimina medidas más antiguas)
         
@@ -807,6 +1569,7 @@ class Database:
         """
         cutoff = datetime.utcnow() - timedelta(days=days)
         cutoff_str = cutoff.isoformat() + 'Z'
+        cutoff_partition = partition_for(cutoff_str)
         
         with self._get_connection() as conn:
             cursor = conn.cursor()
@@ -814,13 +1577,25 @@ class Database:
                 DELETE FROM measurements 
                 WHERE timestamp < ?
             """, (cutoff_str,))
-            deleted = cursor.rowcount
+            legacy_deleted = cursor.rowcount
+            deleted = legacy_deleted
+            
+            dropped = [table for table in _list_partitions(cursor) if table < cutoff_partition]
+            for table in dropped:
+                deleted += cursor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                cursor.execute(f"DROP TABLE {table}")
             conn.commit()
+            self._partitions.difference_update(dropped)
             
-            # VACUUM para recuperar espacio
-            cursor.execute("VACUUM")
+            # VACUUM para recuperar espacio (las páginas de las particiones eliminadas
+            # quedan libres y se reutilizan sin necesidad de VACUUM)
+            if legacy_deleted > 0:
+                cursor.execute("VACUUM")
             
-            logger.info(f"🗑️ Eliminadas {deleted} medidas anteriores a {cutoff_str}")
+            logger.info(
+                f"🗑️ Eliminadas {deleted} medidas anteriores a {cutoff_str} "
+                f"({len(dropped)} particiones diarias)"
+            )
             return deleted
     
     def get_db_stats(self) -> Dict[str, Any]:
@@ -840,19 +1615,24 @@ class Database:
             cursor.execute("SELECT COUNT(*) FROM sensors")
             sensor_count = cursor.fetchone()[0]
             
-            cursor.execute("SELECT COUNT(*) FROM measurements")
-            measurement_count = cursor.fetchone()[0]
+            measurement_count = 0
+            for table in self._measurement_tables(cursor):
+                cursor.execute(f"SELECT COUNT(*) FROM {table}")
+                measurement_count += cursor.fetchone()[0]
             
             cursor.execute("SELECT COUNT(*) FROM alerts")
             alert_count = cursor.fetchone()[0]
             
-            # Tamaño del archivo
-            db_size_bytes = os.path.getsize(self.db_path)
-            db_size_mb = db_size_bytes / (1024 * 1024)
+            # Tamaño de la BD por páginas (válido también en memoria e incluye
+            # las páginas aún en el -wal, que el tamaño del fichero no refleja)
+            page_count = cursor.execute("PRAGMA page_count").fetchone()[0]
+            page_size = cursor.execute("PRAGMA page_size").fetchone()[0]
+            db_size_mb = page_count * page_size / (1024 * 1024)
             
             return {
                 'db_path': self.db_path,
                 'db_size_mb': round(db_size_mb, 2),
+                'page_count': page_count,
                 'device_count': device_count,
                 'sensor_count': sensor_count,
                 'measurement_count': measurement_count,
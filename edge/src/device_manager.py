@@ -28,7 +28,7 @@ Mapa de Registros Modbus (conforme a firmware Arduino):
 
 ============================================================================
 """
-from typing import Dict, Optional, List
+from typing import Callable, Dict, Optional, List, Tuple
 from datetime import datetime
 import time
 from modbus_master import ModbusMaster
@@ -133,18 +133,50 @@ class DeviceManager:
         self.normalizer = normalizer
         self.normalizer = normalizer
         self.devices: Dict[int, Device] = {}  # {unit_id: Device}
+        # Observadores de cambios de identidad: callback(unit_id, Device o None si se retira)
+        self._listeners: List[Callable[[int, Optional[Device]], None]] = []
+        # Caché negativa del discovery: {unit_id: (time.monotonic() de caducidad, ttl)}
+        # El TTL empieza en Config.DISCOVERY_MISS_TTL_SEC y se duplica en cada fallo seguido
+        self._missing: Dict[int, Tuple[float, float]] = {}
+    
+    def register_listener(self, callback: Callable[[int, Optional[Device]], None]):
+        """
+        Registra un observador de cambios en la caché de dispositivos.
+        
+        Se invoca al descubrir un dispositivo, cambiar su alias o su UnitID
+        (con None para el UnitID que deja de existir).
+        
+        Args:
+            callback: Función callback(unit_id, device)
+        """
+        self._listeners.append(callback)
+    
+    def _notify(self, unit_id: int, device: Optional[Device]):
+        """Avisa a los observadores de un cambio en la caché de dispositivos"""
+        for callback in self._listeners:
+            try:
+                callback(unit_id, device)
+            except Exception as e:
+                logger.warning(f"Error en observador de dispositivos (unit {unit_id}): {e}")
     
     def discover_devices(self, unit_id_min: int = 1, unit_id_max: int = 10,
                         discovery_timeout: float = None, 
-                        progress_callback=None) -> List[Device]:
+                        progress_callback=None,
+                        unit_ids: Optional[List[int]] = None,
+                        skip_missing: bool = True) -> List[Device]:
         """
         Descubre dispositivos en el bus escaneando rango de UnitIDs.
         
         Args:
             unit_id_min: UnitID inicial (1..247)
             unit_id_max: UnitID final (1..247)
-            discovery_timeout: Timeout reducido para discovery rápido (default: Config.MODBUS_DISCOVERY_TIMEOUT)
+            discovery_timeout: Margen de respuesta de cada esclavo sondeado, además del tiempo
+                de línea de la trama (default: Config.MODBUS_DISCOVERY_TIMEOUT)
             progress_callback: Función callback(current, total, unit_id) para reportar progreso
+            unit_ids: UnitIDs concretos a sondear (p. ej. los ya registrados en BD);
+                si se indica, se ignora el rango unit_id_min..unit_id_max
+            skip_missing: Si True, no se resondean los UnitIDs que no respondieron en un
+                discovery reciente (caché negativa con TTL adaptativo). False = escaneo completo
         
         Returns:
             Lista de dispositivos encontrados
@@ -154,24 +186,19 @@ class DeviceManager:
         if discovery_timeout is None:
             discovery_timeout = Config.MODBUS_DISCOVERY_TIMEOUT
         
-        # Guardar timeout original y reducir temporalmente
-        original_timeout = self.modbus.timeout
-        
-        # pymodbus 3.x: timeout está en comm_params
-        if hasattr(self.modbus.client, 'comm_params'):
-            logger.info(f"Timeout ANTES: comm_params.timeout_connect={self.modbus.client.comm_params.timeout_connect}")
-            self.modbus.client.comm_params.timeout_connect = discovery_timeout
-            logger.info(f"Timeout DESPUÉS: comm_params.timeout_connect={self.modbus.client.comm_params.timeout_connect}")
+        if unit_ids is None:
+            scan_ids = range(unit_id_min, unit_id_max + 1)
+            logger.info(f"Iniciando discovery: UnitID {unit_id_min}..{unit_id_max} (timeout={discovery_timeout}s)")
         else:
-            logger.warning("No se pudo cambiar timeout - comm_params no disponible")
-        
-        total_units = unit_id_max - unit_id_min + 1
-        logger.info(f"Iniciando discovery: UnitID {unit_id_min}..{unit_id_max} (timeout={discovery_timeout}s)")
+            scan_ids = list(unit_ids)
+            logger.info(f"Iniciando discovery: UnitIDs {scan_ids} (timeout={discovery_timeout}s)")
+        total_units = len(scan_ids)
         found_devices = []
         
         discovery_start = timing.time()
+        skipped = 0
         
-        for idx, unit_id in enumerate(range(unit_id_min, unit_id_max + 1), start=1):
+        for idx, unit_id in enumerate(scan_ids, start=1):
             unit_start = timing.time()
             
             # Reportar progreso
@@ -181,39 +208,53 @@ class DeviceManager:
                 except Exception as e:
                     logger.warning(f"Error en progress_callback: {e}")
             
+            # UnitID sin respuesta en un discovery reciente: se omite hasta que caduque
+            if skip_missing:
+                miss = self._missing.get(unit_id)
+                if miss and miss[0] > timing.monotonic():
+                    skipped += 1
+                    continue
+            
             try:
-                # Leer vendor_id como probe (1 registro)
-                result = self.modbus.read_holding_registers(unit_id, self.HR_INFO_VENDOR_ID, 1, retry=False)
+                # Bus en exclusiva por UnitID (sondeo + identidad): si el polling está
+                # activo, sus tramas se intercalan entre UnitIDs y no dentro de uno
+                with self.modbus.bus_lock:
+                    # Leer vendor_id como probe (1 registro, plazo según tamaño de respuesta)
+                    result = self.modbus.probe_unit(unit_id, self.HR_INFO_VENDOR_ID, discovery_timeout)
+                    
+                    elapsed = timing.time() - unit_start
+                    # Leer identidad completa
+                    device = self._read_device_identity(unit_id) if result else None
                 
-                elapsed = timing.time() - unit_start
                 if result and len(result) >= 1:
                     logger.info(f"✅ UnitID {unit_id} respondió en {elapsed:.3f}s, Vendor=0x{result[0]:04X}")
+                    self._missing.pop(unit_id, None)
                     
-                    # Leer identidad completa
-                    device = self._read_device_identity(unit_id)
                     if device:
                         self.devices[unit_id] = device
                         found_devices.append(device)
+                        self._notify(unit_id, device)
                     
                     # Sin delay después de encontrar dispositivo - el timeout de pymodbus ya da margen suficiente
                 else:
                     logger.debug(f"⏱️ UnitID {unit_id} sin respuesta en {elapsed:.3f}s")
+                    miss = self._missing.get(unit_id)
+                    ttl = (min(miss[1] * 2, Config.DISCOVERY_MISS_TTL_MAX_SEC) if miss
+                           else Config.DISCOVERY_MISS_TTL_SEC)
+                    self._missing[unit_id] = (timing.monotonic() + ttl, ttl)
             
             except Exception as e:
                 elapsed = timing.time() - unit_start
                 logger.debug(f"⏱️ UnitID {unit_id}: error en {elapsed:.3f}s ({e})")
                 continue
         
-        # Restaurar timeout original
-        if hasattr(self.modbus.client, 'comm_params'):
-            self.modbus.client.comm_params.timeout_connect = original_timeout
-            logger.info(f"Timeout RESTAURADO: comm_params.timeout_connect={self.modbus.client.comm_params.timeout_connect}")
-        
         total_time = timing.time() - discovery_start
-        scan_count = unit_id_max - unit_id_min + 1
+        scan_count = total_units - skipped
         avg_time_per_unit = total_time / scan_count if scan_count > 0 else 0
         
         logger.info(f"Discovery completado en {total_time:.2f}s: {len(found_devices)} dispositivos encontrados")
+        if skipped:
+            logger.info(f"⏭️ {skipped} UnitIDs omitidos por no responder en un discovery reciente")
         logger.info(f"📊 Estadísticas: {scan_count} UnitIDs escaneados @ {avg_time_per_unit*1000:.0f}ms/unit (timeout={discovery_timeout*1000:.0f}ms)")
         logger.info(f"📊 Overhead: {(avg_time_per_unit/discovery_timeout - 1)*100:.0f}% sobre timeout teórico")
         
@@ -287,13 +328,14 @@ class DeviceManager:
         """Retorna lista de todos los dispositivos en caché"""
         return list(self.devices.values())
     
-    def update_device_status(self, unit_id: int, success: bool):
+    def update_device_status(self, unit_id: int, success: bool, seen_at: Optional[datetime] = None):
         """
         Actualiza estado de dispositivo tras operación Modbus.
         
         Args:
             unit_id: ID del dispositivo
             success: True si operación exitosa, False si error
+            seen_at: Instante de la lectura (p.ej. el del tick de polling); si None, datetime.now()
         """
         device = self.devices.get(unit_id)
         if not device:
@@ -301,7 +343,7 @@ class DeviceManager:
         
         if success:
             device.status = "online"
-            device.last_seen = datetime.now()
+            device.last_seen = seen_at or datetime.now()
             device.consecutive_errors = 0
         else:
             device.consecutive_errors += 1
@@ -385,6 +427,7 @@ class DeviceManager:
         device = self.devices.get(unit_id)
         if device:
             device.alias = alias
+            self._notify(unit_id, device)
         
         self.update_device_status(unit_id, True)
         logger.info(f"✅ Alias escrito en RAM de unit {unit_id}")
@@ -418,6 +461,8 @@ class DeviceManager:
         if device:
             device.unit_id = new_unit_id
             self.devices[new_unit_id] = device
+            self._notify(current_unit_id, None)
+            self._notify(new_unit_id, device)
         
         self.update_device_status(new_unit_id, True)
         logger.info(f"✅ UnitID cambiado de {current_unit_id} a {new_unit_id} (RAM)")
@@ -500,6 +545,8 @@ class DeviceManager:
         if device:
             device.unit_id = new_unit_id
             self.devices[new_unit_id] = device
+            self._notify(old_unit_id, None)
+            self._notify(new_unit_id, device)
             logger.info(f"Caché actualizada: UnitID {old_unit_id} → {new_unit_id}")
         
         self.update_device_status(new_unit_id, True)
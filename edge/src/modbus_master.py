@@ -23,7 +23,13 @@ Nota Importante:
 
 ============================================================================
 """
+from array import array
+from contextlib import contextmanager
 from typing import Optional, List
+import logging
+import struct
+import sys
+import threading
 import time
 from pymodbus.client import ModbusSerialClient
 from pymodbus.exceptions import ModbusException
@@ -31,6 +37,78 @@ from logger import logger
 from config import Config
 
 
+# ============================================================================
+# MAPA DE HOLDING REGISTERS (bloques leídos por el Edge)
+# ============================================================================
+HR_INFO_START = 0x0000          # BLOQUE 1: info del dispositivo (10 regs)
+HR_INFO_LEN = 10
+HR_INFO_RUNTIME_START = 0x0006  # Parte variable de la info: uptime LO/HI, status, errors
+HR_INFO_RUNTIME_LEN = 4
+HR_DIAG_START = 0x0020          # BLOQUE 4: estadísticas Modbus (6 regs)
+HR_DIAG_LEN = 6
+MAX_READ_WORDS = 32             # Límite del firmware por trama (MAX_HOLDING_READ)
+
+# Modbus transmite los registros big-endian: en hosts little-endian hay que invertir bytes
+_SWAP_REGISTERS = sys.byteorder == 'little'
+
+
+# ============================================================================
+# CRC16 MODBUS (polinomio reflejado 0xA001, semilla 0xFFFF)
+# ============================================================================
+def _build_crc16_table() -> tuple:
+    """Precalcula el CRC de cada byte posible (256 entradas)"""
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 0x0001 else crc >> 1
+        table.append(crc)
+    return tuple(table)
+
+
+_CRC16_TABLE = _build_crc16_table()
+
+
+def crc16_modbus(data: bytes) -> int:
+    """
+    CRC16 Modbus por tabla: una consulta por byte en lugar de 8 desplazamientos.
+    
+    Args:
+        data: Trama sin CRC
+        
+    Returns:
+        CRC de 16 bits (se transmite LSB primero)
+    """
+    crc = 0xFFFF
+    table = _CRC16_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+def build_rtu_read(unit_id: int, function: int, address: int, count: int) -> bytes:
+    """
+    Construye la trama RTU completa de una lectura de registros (0x03 / 0x04).
+    
+    Args:
+        unit_id: ID del esclavo (1..247)
+        function: Código de función (0x03 holding, 0x04 input)
+        address: Dirección inicial del registro
+        count: Cantidad de registros a leer
+        
+    Returns:
+        Trama [unit, función, addr_H, addr_L, count_H, count_L, CRC_L, CRC_H]
+    """
+    frame = struct.pack('>BBHH', unit_id, function, address, count)
+    crc = crc16_modbus(frame)
+    return frame + bytes((crc & 0xFF, crc >> 8))
+
+
+def build_rtu_read_input(unit_id: int, address: int, count: int) -> bytes:
+    """Trama RTU de lectura de input registers (0x04), ver build_rtu_read"""
+    return build_rtu_read(unit_id, 0x04, address, count)
+
+
 class ModbusMaster:
     """Modbus RTU Master - Inicia peticiones a dispositivos esclavos"""
     
@@ -70,6 +148,20 @@ class ModbusMaster:
         # Contadores por unidad para diagnósticos finos
         self._timeouts_per_unit = {}
         
+        # Tiempos de línea RTU: 11 bits por carácter (start + 8 datos + paridad/stop + stop)
+        # y silencio t3.5 entre tramas (fijo en 1.75 ms por encima de 19200 bps)
+        self._char_time = 11.0 / self.baudrate
+        self._silent_interval = 0.00175 if self.baudrate > 19200 else 3.5 * self._char_time
+        self._last_probe_at = 0.0  # time.monotonic() al terminar el último probe_unit
+        # Margen de respuesta del esclavo en lecturas precompiladas (ver read_input_precompiled)
+        self._response_budget = Config.MODBUS_RESPONSE_BUDGET_MS / 1000.0
+        
+        # Un maestro por bus RS-485 (puerto serie): el bus admite una sola transacción en
+        # vuelo, así que todos los usuarios del puerto (polling, discovery) se serializan
+        # con este lock. Con varios adaptadores, cada ModbusMaster tiene el suyo
+        self.bus_id = self.port
+        self.bus_lock = threading.Lock()
+        
         self._connected = False
         logger.info(f"ModbusClient inicializado: {self.port} @ {self.baudrate} bps")
     
@@ -104,6 +196,30 @@ class ModbusMaster:
         """Retorna si está conectado al puerto serie"""
         return self._connected and self.client.connected
     
+    @contextmanager
+    def scaled_timeout(self, errors: int):
+        """
+        Eleva temporalmente el timeout del cliente según los errores consecutivos
+        del dispositivo (x2 por error, hasta x8 y ~1.2s máx) y lo restaura al salir.
+        
+        Sin errores (caso habitual) no toca el cliente serie.
+        
+        Args:
+            errors: Errores consecutivos del dispositivo destino
+        """
+        old_timeout = getattr(self.client, 'timeout', None) if errors > 0 else None
+        if old_timeout is None:
+            yield
+            return
+        
+        new_timeout = min(Config.MODBUS_TIMEOUT * (1 << min(errors, 3)), 1.2)
+        self.client.timeout = new_timeout
+        logger.debug("timeout escalado a %.2fs por %d errores", new_timeout, errors)
+        try:
+            yield
+        finally:
+            self.client.timeout = old_timeout
+    
     def read_holding_registers(self, unit_id: int, address: int, count: int,
                                retry: bool = True) -> Optional[List[int]]:
         """
@@ -121,20 +237,19 @@ class ModbusMaster:
         Returns:
             Lista de valores (int) o None si error
         """
-        import time as timing
         if not self.is_connected():
             logger.error("Modbus Master no conectado")
             return None
         
         try:
-            start_time = timing.time()
+            start_time = time.time()
             self.stats['tx_frames'] += 1
             result = self.client.read_holding_registers(address, count, slave=unit_id)
-            elapsed = timing.time() - start_time
+            elapsed = time.time() - start_time
             
             if result.isError():
                 # Log solo en DEBUG para discovery masivo
-                logger.debug(f"⏱️ No response unit={unit_id} addr=0x{address:04X} in {elapsed:.3f}s")
+                logger.debug("⏱️ No response unit=%d addr=0x%04X in %.3fs", unit_id, address, elapsed)
                 
                 # Reintentar solo si es timeout y retry=True
                 if retry and ("Timeout" in str(result) or "No response" in str(result)):
@@ -147,12 +262,12 @@ class ModbusMaster:
                 return None
             
             self.stats['rx_frames'] += 1
-            logger.debug(f"⏱️ OK unit={unit_id} addr=0x{address:04X} in {elapsed:.3f}s")
+            logger.debug("⏱️ OK unit=%d addr=0x%04X in %.3fs", unit_id, address, elapsed)
             return result.registers
         
         except ModbusException as e:
             self.stats['exceptions'] += 1
-            logger.debug(f"ModbusException unit={unit_id}: {e}")
+            logger.debug("ModbusException unit=%d: %s", unit_id, e)
             return None
         
         except Exception as e:
@@ -181,8 +296,11 @@ class ModbusMaster:
             self.stats['tx_frames'] += 1
             result = self.client.read_input_registers(address, count, slave=unit_id)
             
-            logger.debug(f"🔍 read_input_registers unit={unit_id} addr=0x{address:04X} count={count}")
-            logger.debug(f"   result.isError()={result.isError()}, type={type(result)}")
+            # Trazas por trama solo con DEBUG activo (evita formatear en cada lectura)
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                logger.debug("🔍 read_input_registers unit=%d addr=0x%04X count=%d", unit_id, address, count)
+                logger.debug("   result.isError()=%s, type=%s", result.isError(), type(result))
             
             if result.isError():
                 logger.warning(f"❌ No response unit={unit_id} addr=0x{address:04X}: {result}")
@@ -195,7 +313,8 @@ class ModbusMaster:
                 return None
             
             self.stats['rx_frames'] += 1
-            logger.debug(f"✅ Received {len(result.registers)} registers: {result.registers[:5]}...")
+            if debug:
+                logger.debug("✅ Received %d registers: %s...", len(result.registers), result.registers[:5])
             return result.registers
         
         except ModbusException as e:
@@ -207,6 +326,160 @@ class ModbusMaster:
             logger.error(f"Error inesperado al leer IR: {e}")
             return None
     
+    def read_input_precompiled(self, unit_id: int, frame: bytes, count: int,
+                               retry: bool = True) -> Optional[array]:
+        """
+        Lee input registers (0x04) enviando una trama ya construida con build_rtu_read_input.
+        
+        Para lecturas de forma fija (telemetría del poller) evita el framer de pymodbus
+        y el CRC de la petición en cada llamada: se escribe la trama al puerto serie y
+        se lee la respuesta de longitud conocida (5 + 2*count bytes). Los registros se
+        devuelven como array('H') creado de una vez desde los bytes del payload (sin un
+        int Python por registro hasta que se indexa). Si no hay acceso directo al puerto
+        se delega en read_input_registers y su lista se convierte también a array('H'),
+        de modo que el llamador recibe siempre el mismo tipo.
+        
+        El plazo de lectura no es el timeout fijo del cliente sino el tiempo de línea de
+        petición + respuesta más el margen del esclavo (Config.MODBUS_RESPONSE_BUDGET_MS),
+        multiplicado por el mismo factor que aplique scaled_timeout a un dispositivo con
+        errores. Un esclavo que no responde cuesta ese plazo y no MODBUS_TIMEOUT. El
+        timeout del puerto se restaura al terminar, como en probe_unit.
+        
+        Args:
+            unit_id: ID del esclavo (el de la trama)
+            frame: Trama de petición precompilada
+            count: Cantidad de registros pedidos en la trama
+            retry: Si True, reintenta una vez en caso de timeout
+            
+        Returns:
+            array('H') de valores o None si error
+        """
+        sock = getattr(self.client, 'socket', None)
+        if not sock:
+            address = (frame[2] << 8) | frame[3]
+            regs = self.read_input_registers(unit_id, address, count, retry=retry)
+            return array('H', regs) if regs else None
+        
+        if not self.is_connected():
+            logger.error("Modbus Master no conectado")
+            return None
+        
+        old_timeout = sock.timeout
+        try:
+            # Plazo según tamaño de respuesta, escalado como el timeout del cliente
+            # (scaled_timeout); sin reconfigurar el puerto si no cambia
+            expected = 5 + 2 * count
+            scale = (getattr(self.client, 'timeout', None) or self.timeout) / self.timeout
+            timeout = ((len(frame) + expected) * self._char_time + self._response_budget) * scale
+            if sock.timeout != timeout:
+                sock.timeout = timeout
+            
+            self.stats['tx_frames'] += 1
+            sock.reset_input_buffer()
+            sock.write(frame)
+            response = sock.read(expected)
+            
+            if len(response) == 5 and response[1] == 0x84:
+                # Excepción Modbus: [unit, 0x84, código, CRC_L, CRC_H]
+                logger.warning(f"❌ Excepción Modbus {response[2]} unit={unit_id} (0x04 precompilada)")
+                self.stats['exceptions'] += 1
+                return None
+            
+            if len(response) < expected:
+                logger.warning(f"❌ No response unit={unit_id} ({len(response)}/{expected} bytes)")
+                if retry:
+                    self.stats['timeouts'] += 1
+                    self._timeouts_per_unit[unit_id] = self._timeouts_per_unit.get(unit_id, 0) + 1
+                    time.sleep(0.01)
+                    return self.read_input_precompiled(unit_id, frame, count, retry=False)
+                self.stats['exceptions'] += 1
+                return None
+            
+            rx_crc = response[-2] | (response[-1] << 8)
+            if (response[0] != unit_id or response[1] != 0x04 or response[2] != 2 * count
+                    or rx_crc != crc16_modbus(response[:-2])):
+                logger.warning(f"❌ Respuesta inválida unit={unit_id}: {response.hex()}")
+                self.stats['crc_errors'] += 1
+                return None
+            
+            self.stats['rx_frames'] += 1
+            regs = array('H', response[3:-2])
+            if _SWAP_REGISTERS:
+                regs.byteswap()
+            return regs
+        
+        except Exception as e:
+            logger.error(f"Error inesperado al leer IR (trama precompilada): {e}")
+            self.stats['errors'] += 1
+            return None
+        finally:
+            # El resto de usuarios del puerto (pymodbus, probe_unit) esperan su timeout
+            if sock.timeout != old_timeout:
+                sock.timeout = old_timeout
+    
+    def probe_unit(self, unit_id: int, address: int, response_budget: float) -> Optional[List[int]]:
+        """
+        Sondea un esclavo leyendo 1 holding register con plazo ajustado (discovery).
+        
+        La respuesta a una lectura de 1 registro mide siempre 7 bytes, así que el plazo
+        es el tiempo de línea de petición + respuesta más el margen de respuesta del
+        esclavo, en lugar del timeout completo de pymodbus por cada UnitID ausente.
+        Entre sondeos solo se espera lo que falte del silencio t3.5. Si no hay acceso
+        directo al puerto se delega en read_holding_registers sin reintento.
+        
+        Args:
+            unit_id: ID del esclavo a sondear
+            address: Registro a leer (p. ej. HR_INFO_VENDOR_ID)
+            response_budget: Margen en segundos para que el esclavo empiece a responder
+            
+        Returns:
+            Lista con el valor del registro o None si no responde / respuesta inválida
+        """
+        sock = getattr(self.client, 'socket', None)
+        if not sock:
+            return self.read_holding_registers(unit_id, address, 1, retry=False)
+        
+        if not self.is_connected():
+            logger.error("Modbus Master no conectado")
+            return None
+        
+        frame = build_rtu_read(unit_id, 0x03, address, 1)
+        expected = 7  # [unit, 0x03, 2, val_H, val_L, CRC_L, CRC_H]
+        deadline = (len(frame) + expected) * self._char_time + response_budget
+        old_timeout = sock.timeout
+        try:
+            wait = self._silent_interval - (time.monotonic() - self._last_probe_at)
+            if wait > 0:
+                time.sleep(wait)
+            sock.timeout = deadline
+            self.stats['tx_frames'] += 1
+            sock.reset_input_buffer()
+            sock.write(frame)
+            response = sock.read(expected)
+            self._last_probe_at = time.monotonic()
+            
+            # Sin respuesta (o excepción Modbus de 5 bytes): el UnitID no está disponible
+            if len(response) < expected:
+                return None
+            
+            rx_crc = response[-2] | (response[-1] << 8)
+            if (response[0] != unit_id or response[1] != 0x03 or response[2] != 2
+                    or rx_crc != crc16_modbus(response[:-2])):
+                logger.warning(f"❌ Respuesta inválida al sondear unit={unit_id}: {response.hex()}")
+                self.stats['crc_errors'] += 1
+                return None
+            
+            self.stats['rx_frames'] += 1
+            return [(response[3] << 8) | response[4]]
+        
+        except Exception as e:
+            logger.error(f"Error inesperado al sondear unit={unit_id}: {e}")
+            self.stats['errors'] += 1
+            return None
+        finally:
+            if sock.timeout != old_timeout:
+                sock.timeout = old_timeout
+    
     def write_register(self, unit_id: int, address: int, value: int) -> bool:
         """
         Escribe un registro (función 0x06).
@@ -307,26 +580,9 @@ class ModbusMaster:
                 logger.error("No hay acceso al socket serial")
                 return None
             
-            # Importar CRC desde utils
-            import sys
-            import os
-            sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../firmware/lib/utils/src'))
-            
-            # Calcular CRC16 Modbus manualmente
-            def calc_crc16(data: bytes) -> int:
-                crc = 0xFFFF
-                for byte in data:
-                    crc ^= byte
-                    for _ in range(8):
-                        if crc & 0x0001:
-                            crc = (crc >> 1) ^ 0xA001
-                        else:
-                            crc >>= 1
-                return crc
-            
             # Construir trama: [UnitID, 0x41, CRC_L, CRC_H]
             frame = bytes([unit_id, 0x41])
-            crc = calc_crc16(frame)
+            crc = crc16_modbus(frame)
             frame += bytes([crc & 0xFF, (crc >> 8) & 0xFF])
             
             logger.debug(f"Enviando 0x41 a unit {unit_id}: {frame.hex()}")
@@ -359,7 +615,7 @@ class ModbusMaster:
                                 # Verificar CRC
                                 frame_no_crc = response[:data_end]
                                 rx_crc = response[data_end] | (response[data_end+1] << 8)
-                                calc_crc_val = calc_crc16(frame_no_crc)
+                                calc_crc_val = crc16_modbus(frame_no_crc)
                                 
                                 if rx_crc == calc_crc_val:
                                     # Extraer ASCII info (skip slave_id y run_indicator)
@@ -396,6 +652,28 @@ class ModbusMaster:
     # DIAGNÓSTICO Y ESTADO DEL DISPOSITIVO
     # ========================================================================
     
+    def read_block(self, unit_id: int, start: int, count: int) -> Optional[List[int]]:
+        """
+        Lee un bloque contiguo de holding registers en una sola trama.
+        
+        Permite agrupar varias zonas del mapa en una petición (las reservas
+        intermedias devuelven 0) y trocear el resultado en Python.
+        
+        Args:
+            unit_id: ID del dispositivo esclavo
+            start: Dirección inicial del bloque
+            count: Registros a leer (máx MAX_READ_WORDS)
+            
+        Returns:
+            Lista con exactamente count registros o None si falla
+        """
+        if count > MAX_READ_WORDS:
+            raise ValueError(f"Bloque de {count} registros excede el máximo por trama ({MAX_READ_WORDS})")
+        regs = self.read_holding_registers(unit_id, start, count)
+        if not regs or len(regs) < count:
+            return None
+        return regs
+    
     def read_device_info(self, unit_id: int) -> Optional[dict]:
         """
         Lee información básica del dispositivo (BLOQUE 1: HR 0x0000-0x0009).
@@ -407,8 +685,8 @@ class ModbusMaster:
             Dict con vendor_id, product_id, hw_version, fw_version, unit_id_echo,
             capabilities, uptime_s, status, errors. None si falla.
         """
-        regs = self.read_holding_registers(unit_id, 0x0000, 10)
-        if not regs or len(regs) < 10:
+        regs = self.read_holding_registers(unit_id, HR_INFO_START, HR_INFO_LEN)
+        if not regs or len(regs) < HR_INFO_LEN:
             return None
         
         return {
@@ -418,9 +696,15 @@ class ModbusMaster:
             'fw_version': f"{regs[3] >> 8}.{regs[3] & 0xFF}",
             'unit_id_echo': regs[4],
             'capabilities': regs[5],
-            'uptime_s': (regs[7] << 16) | regs[6],  # 32-bit: HI, LO
-            'status': regs[8],
-            'errors': regs[9]
+            **self.decode_info_runtime(regs[6:10])
+        }
+    
+    def decode_info_runtime(self, regs: List[int]) -> dict:
+        """Decodifica la parte variable de la info (HR 0x0006-0x0009): uptime, status, errors"""
+        return {
+            'uptime_s': (regs[1] << 16) | regs[0],  # 32-bit: HI, LO
+            'status': regs[2],
+            'errors': regs[3]
         }
     
     def read_device_diagnostics(self, unit_id: int) -> Optional[dict]:
@@ -434,10 +718,13 @@ class ModbusMaster:
             Dict con rx_ok, crc_errors, exceptions, tx_ok, uart_overruns, last_exception.
             None si falla.
         """
-        regs = self.read_holding_registers(unit_id, 0x0020, 6)
-        if not regs or len(regs) < 6:
+        regs = self.read_holding_registers(unit_id, HR_DIAG_START, HR_DIAG_LEN)
+        if not regs or len(regs) < HR_DIAG_LEN:
             return None
-        
+        return self.decode_device_diagnostics(regs)
+    
+    def decode_device_diagnostics(self, regs: List[int]) -> dict:
+        """Decodifica el bloque de estadísticas Modbus (HR 0x0020-0x0025)"""
         return {
             'rx_ok': regs[0],
             'crc_errors': regs[1],
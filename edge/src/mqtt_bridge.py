@@ -193,7 +193,7 @@ class MQTTBridge:
     
     def _on_publish(self, client, userdata, mid):
         """Callback cuando se publica un mensaje."""
-        logger.debug(f"📤 Mensaje MQTT publicado (mid: {mid})")
+        logger.debug("📤 Mensaje MQTT publicado (mid: %s)", mid)
     
     
     def _on_message(self, client, userdata, msg):
@@ -482,7 +482,7 @@ class MQTTBridge:
                 return f"Discovery ya en ejecución ({progress}/{total})"
             
             # Lanzar discovery en thread
-            discovery_thread = threading.Thread(target=start_initial_discovery, daemon=True)
+            discovery_thread = threading.Thread(target=start_initial_discovery, kwargs={'full_scan': True}, daemon=True)
             discovery_thread.start()
             
             logger.info("🔍 Discovery iniciado por comando RPC de ThingsBoard")
@@ -587,7 +587,9 @@ class MQTTBridge:
         try:
             if self.is_thingsboard:
                 # Modo ThingsBoard: acumular medidas y publicar en batch
-                return self._publish_measurement_thingsboard(sensor_id, value, timestamp, extra_keys)
+                # (caché compartida con publish_batch_measurements: bajo self._lock)
+                with self._lock:
+                    return self._publish_measurement_thingsboard(sensor_id, value, timestamp, extra_keys)
             else:
                 # Modo MQTT estándar
                 return self._publish_measurement_standard(device_id, sensor_id, sensor_type, value, unit, timestamp, quality, extra_keys)
@@ -631,19 +633,41 @@ class MQTTBridge:
         result = self.client.publish(topic, json.dumps(payload), qos=self.qos)
         
         if result.rc == mqtt.MQTT_ERR_SUCCESS:
-            logger.debug(f"📤 Medida publicada: {topic} -> {value} {unit}")
+            logger.debug("📤 Medida publicada: %s -> %s %s", topic, value, unit)
             return True
         else:
             logger.warning(f"⚠️  Error al publicar medida en {topic}: rc={result.rc}")
             return False
     
     
+    @staticmethod
+    def _thingsboard_device_name(sensor_id: str) -> Optional[str]:
+        """
+        Nombre del dispositivo ThingsBoard de un sensor_id.
+        
+        UNIT_2_TILT_X -> "Sensor_Unit2"; GATEWAY_MODBUS_DIAG -> "RPI_EDGE"
+        (None si el sensor_id no tiene formato reconocible)
+        """
+        if sensor_id.startswith('GATEWAY_'):
+            # Diagnóstico agregado del Gateway
+            return Config.EDGE_GATEWAY_NAME  # "RPI_EDGE"
+        
+        # Dispositivos individuales
+        parts = sensor_id.split('_')
+        if len(parts) < 2:
+            return None
+        
+        unit_id = parts[1]  # "2"
+        return f"Sensor_Unit{unit_id}"
+    
+    
     def _publish_measurement_thingsboard(
         self,
         sensor_id: str,
         value: float,
         timestamp: Optional[str],
-        extra_keys: Optional[Dict[str, Any]] = None
+        extra_keys: Optional[Dict[str, Any]] = None,
+        defer_flush: bool = False
     ) -> bool:
         """
         Publicación para ThingsBoard Gateway.
@@ -656,24 +680,17 @@ class MQTTBridge:
           }
         
         Soporta extra_keys para enviar múltiples métricas (ej: diagnóstico).
+        Con defer_flush=True solo acumula en caché (el llamador hace el flush).
+        El llamador debe tener tomado self._lock (la caché es compartida).
         
         Ref: https://thingsboard.io/docs/reference/gateway-mqtt-api/
         """
         # Extraer device_id y tipo de sensor del sensor_id
         # UNIT_2_TILT_X -> device: "Sensor_Unit2", key: "tilt_x"
         # GATEWAY_MODBUS_DIAG -> device: "RPI_EDGE", key: "diag_success_rate"
-        
-        if sensor_id.startswith('GATEWAY_'):
-            # Diagnóstico agregado del Gateway
-            device_name = Config.EDGE_GATEWAY_NAME  # "RPI_EDGE"
-        else:
-            # Dispositivos individuales
-            parts = sensor_id.split('_')
-            if len(parts) < 2:
-                return False
-            
-            unit_id = parts[1]  # "2"
-            device_name = f"Sensor_Unit{unit_id}"
+        device_name = self._thingsboard_device_name(sensor_id)
+        if device_name is None:
+            return False
         
         # Mapeo de tipo de sensor a clave ThingsBoard
         # IMPORTANTE: Ordenar de más específico a menos específico para evitar matches parciales
@@ -719,6 +736,9 @@ class MQTTBridge:
             for extra_key, extra_value in extra_keys.items():
                 self._measurement_cache[device_name][extra_key] = extra_value
         
+        if defer_flush:
+            return True
+        
         # Publicar si han pasado suficiente tiempo o tenemos varias medidas
         now = time.time()
         last_publish = self._last_publish_time.get(device_name, 0)
@@ -740,7 +760,6 @@ class MQTTBridge:
             
             # Timestamp en milisegundos
             if timestamp:
-                from datetime import datetime
                 dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
                 ts_ms = int(dt.timestamp() * 1000)
             else:
@@ -758,7 +777,7 @@ class MQTTBridge:
             result = self.client.publish(topic, json.dumps(payload), qos=self.qos)
             
             if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                logger.info(f"📤 ThingsBoard Gateway telemetry: {device_name} -> {list(payload[device_name][0]['values'].keys())}")
+                logger.debug("📤 ThingsBoard Gateway telemetry: %s -> %s", device_name, list(payload[device_name][0]['values']))
                 self._measurement_cache[device_name] = {}
                 self._last_publish_time[device_name] = time.time()
                 return True
@@ -1096,6 +1115,9 @@ class MQTTBridge:
         """
         Publica múltiples medidas en batch.
         
+        En modo ThingsBoard todas las medidas se acumulan primero en caché y se
+        envía un único mensaje por dispositivo (en lugar de un flush cada 4 claves).
+        
         Args:
             measurements: Lista de dicts con campos para publish_measurement()
         
@@ -1106,6 +1128,25 @@ class MQTTBridge:
             return 0
         
         success_count = 0
+        if self.is_thingsboard:
+            try:
+                with self._lock:
+                    # Solo los dispositivos de este batch, cada uno con su timestamp
+                    touched = {}  # {device_name: timestamp}
+                    for m in measurements:
+                        timestamp = m.get('timestamp')
+                        if self._publish_measurement_thingsboard(
+                            m['sensor_id'], m['value'], timestamp, m.get('extra_keys'), defer_flush=True
+                        ):
+                            success_count += 1
+                            touched[self._thingsboard_device_name(m['sensor_id'])] = timestamp
+                    
+                    for device_name, timestamp in touched.items():
+                        self._flush_thingsboard_gateway_cache(device_name, timestamp)
+            except Exception as e:
+                logger.error(f"❌ Error al publicar batch de medidas: {e}", exc_info=True)
+            return success_count
+        
         for m in measurements:
             if self.publish_measurement(**m):
                 success_count += 1
@@ -0,0 +1,146 @@
+"""
+============================================================================
+POLL SCHEDULER - Colas de trabajo con robo (work-stealing) para el polling
+============================================================================
+
+Cada worker de polling tiene su propia cola doble (deque) protegida por su
+propio lock. El planificador reparte los trabajos por unit_id (siempre a la
+misma cola → localidad por dispositivo) y cada worker:
+    1. Saca trabajos de la cabeza de su propia cola
+    2. Si está vacía, roba de la cola de otro worker por el extremo opuesto
+       (disciplina Chase-Lev), con try-lock para no bloquearse con el dueño.
+       Se roba la mitad de la cola de la víctima de una vez (steal-half): un
+       solo paso por el lock ajeno por lote en lugar de uno por trabajo
+
+Así no hay un único cursor/lock compartido por todos los workers, y un worker
+ocioso absorbe la carga de otro que se ha quedado atascado en timeouts.
+
+Autor: Sergio Lobo Alonso - TFM UNIR
+============================================================================
+"""
+import random
+import threading
+from collections import deque
+from typing import Any, Hashable, List, Optional
+
+
+class WorkStealingPollScheduler:
+    """Conjunto de colas por worker con robo de trabajo entre ellas"""
+
+    def __init__(self, num_workers: int):
+        """
+        Args:
+            num_workers: Número de workers (una cola por worker)
+        """
+        self.num_workers = max(1, num_workers)
+        self._queues: List[deque] = [deque() for _ in range(self.num_workers)]
+        self._locks: List[threading.Lock] = [threading.Lock() for _ in range(self.num_workers)]
+        # Cuenta trabajos pendientes en total: un acquire() exitoso garantiza que
+        # hay al menos un trabajo en alguna cola (propia o ajena)
+        self._available = threading.Semaphore(0)
+
+    def push(self, job: Any, key: Hashable) -> int:
+        """
+        Encola un trabajo al final de la cola del worker asignado a key.
+
+        Args:
+            job: Trabajo opaco para el worker
+            key: Clave de reparto (unit_id): misma clave → misma cola
+
+        Returns:
+            Índice de la cola destino
+        """
+        idx = hash(key) % self.num_workers
+        with self._locks[idx]:
+            self._queues[idx].append(job)
+        self._available.release()
+        return idx
+
+    def get(self, idx: int, timeout: Optional[float] = None) -> Optional[Any]:
+        """
+        Obtiene el siguiente trabajo para el worker idx (propio o robado).
+
+        Args:
+            idx: Índice del worker
+            timeout: Espera máxima en segundos si no hay trabajo
+
+        Returns:
+            Trabajo o None si venció el timeout o no se encontró el trabajo reservado
+        """
+        if not self._available.acquire(timeout=timeout):
+            return None
+
+        # Hay un trabajo reservado para este worker en alguna cola: buscarlo
+        job = self._pop_local(idx)
+        if job is None:
+            job = self._steal(idx)
+        if job is None:
+            # Una pasada sin trabajo: víctimas con el lock ocupado o un clear()
+            # concurrente. Se devuelve el permiso y el worker reintenta desde
+            # su bucle (donde comprueba la parada), sin girar aquí dentro
+            self._available.release()
+        return job
+
+    def pending(self) -> int:
+        """Número aproximado de trabajos encolados (suma de todas las colas)"""
+        return sum(len(q) for q in self._queues)
+
+    def clear(self):
+        """Descarta todos los trabajos pendientes"""
+        for idx in range(self.num_workers):
+            with self._locks[idx]:
+                dropped = len(self._queues[idx])
+                self._queues[idx].clear()
+            for _ in range(dropped):
+                self._available.acquire(blocking=False)
+
+    def _pop_local(self, idx: int) -> Optional[Any]:
+        """Saca de la cabeza de la cola propia (FIFO para el dueño)"""
+        with self._locks[idx]:
+            queue = self._queues[idx]
+            return queue.popleft() if queue else None
+
+    def steal_half(self, idx: int, victim: int) -> List[Any]:
+        """
+        Roba la mitad (redondeando hacia arriba) de la cola de victim.
+
+        Los trabajos se sacan del final de la cola de la víctima en una sola
+        sección crítica y se devuelven en su orden original.
+
+        Args:
+            idx: Índice del worker ladrón
+            victim: Índice del worker víctima
+
+        Returns:
+            Trabajos robados (lista vacía si la cola estaba vacía o su lock ocupado)
+        """
+        lock = self._locks[victim]
+        if victim == idx or not lock.acquire(blocking=False):
+            return []
+        try:
+            queue = self._queues[victim]
+            n = (len(queue) + 1) // 2
+            stolen = [queue.pop() for _ in range(n)]
+        finally:
+            lock.release()
+        stolen.reverse()
+        return stolen
+
+    def _steal(self, idx: int) -> Optional[Any]:
+        """
+        Roba trabajo de otro worker: ejecuta el primero y deja el resto del
+        lote en la cabeza de la cola propia.
+
+        Las víctimas se recorren en orden aleatorio; si el lock de una víctima
+        está ocupado se pasa a la siguiente en lugar de esperar.
+        """
+        victims = [v for v in range(self.num_workers) if v != idx]
+        random.shuffle(victims)
+        for victim in victims:
+            stolen = self.steal_half(idx, victim)
+            if stolen:
+                if len(stolen) > 1:
+                    with self._locks[idx]:
+                        self._queues[idx].extendleft(reversed(stolen[1:]))
+                return stolen[0]
+        return None
@@ -12,12 +12,15 @@ Responsabilidades:
 
 Arquitectura del Polling:
     
-    PollingService (thread)
+    PollingService (thread planificador)
         │
-        ├── Tick cada ~200ms (ajustable según num dispositivos)
+        ├── Min-heap de vencimientos (time.monotonic(), unit_id)
+        │      espera exactamente hasta el siguiente dispositivo debido;
+        │      periodo por dispositivo ≈ PER_DEVICE_REFRESH_SEC (≥ N × 200ms)
         │
-        ├── Round-robin: selecciona 1 dispositivo por tick
-        │      cursor = (cursor + 1) % len(devices)
+        ├── Encola el dispositivo en WorkStealingPollScheduler
+        │      workers de polling (MAX_POLL_WORKERS) con robo de trabajo;
+        │      las tramas Modbus se serializan con un lock de bus
         │
         ├── Lectura Modbus (estrategia según capacidades):
         │      • Wind-only: 9 regs (0x0009-0x0011)
@@ -26,8 +29,8 @@ Arquitectura del Polling:
         │
         ├── Normalización (DataNormalizer)
         │
-        ├── Emisión WebSocket
-        │      on_telemetry_callback(data)
+        ├── Emisión WebSocket (cola acotada + thread despachador)
+        │      on_telemetry_callback(data), con número de secuencia 'seq'
         │
         └── Backoff adaptativo en errores:
                1er error: 5s, 2do: 10s, 3ro: 20s, ... max 60s
@@ -39,17 +42,53 @@ Estrategia de Backoff:
 
 ============================================================================
 """
+import heapq
+import itertools
+import logging
+import math
+import queue
 import threading
 import time
-from typing import List, Optional, Callable
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Callable, Tuple
 from datetime import datetime
-from modbus_master import ModbusMaster
-from device_manager import DeviceManager
+from modbus_master import (
+    ModbusMaster, HR_DIAG_LEN, HR_DIAG_START, HR_INFO_RUNTIME_LEN, HR_INFO_RUNTIME_START,
+    build_rtu_read_input
+)
+from device_manager import DeviceManager, Device
 from data_normalizer import DataNormalizer
 from database import Database
 from logger import logger
 from config import Config
 from alert_engine import AlertEngine
+from poll_scheduler import WorkStealingPollScheduler
+
+
+# Magnitudes escalares de telemetría que se persisten como medida independiente:
+# (clave telemetría, sufijo sensor_id, tipo, unidad, publicar MQTT, verificar umbrales)
+_SCALAR_FIELDS = (
+    ('angle_x_deg', 'TILT_X', 'tilt', 'deg', True, True),
+    ('angle_y_deg', 'TILT_Y', 'tilt', 'deg', True, True),
+    ('temperature_c', 'TEMP', 'temperature', 'celsius', True, True),
+    ('wind_speed_mps', 'WIND_SPEED', 'wind', 'm_s', True, True),
+    ('wind_direction_deg', 'WIND_DIR', 'wind', 'deg', False, False),
+    ('load_kg', 'LOAD', 'load', 'kg', True, True),
+)
+
+# Magnitudes vectoriales (se guarda el módulo y opcionalmente cada componente):
+# (clave telemetría, sufijo sensor_id, tipo, unidad, ((sufijo componente, clave), ...), guardar componentes)
+_VECTOR_FIELDS = (
+    ('acceleration', 'ACCEL', 'acceleration', 'g',
+     (('ACCEL_X', 'x_g'), ('ACCEL_Y', 'y_g'), ('ACCEL_Z', 'z_g')), True),
+    ('gyroscope', 'GYRO', 'gyroscope', 'dps',
+     (('GYRO_X', 'x_dps'), ('GYRO_Y', 'y_dps'), ('GYRO_Z', 'z_dps')), False),
+)
+
+# Marcador de "clave ausente" para dict.get (distingue ausencia de un valor None)
+_SENTINEL = object()
 
 
 class PollingService:
@@ -64,6 +103,20 @@ class PollingService:
     # +9 estadísticas aceleración (x/y/z min/max/avg)
     IR_TOTAL_WITH_WIND_AND_STATS = 13 + 2 + 3 + 9  # 27
     MIN_INTERVAL_SEC = 0.2  # Evita saturar el bus/CPU con intervalos demasiado bajos
+    STATIC_INFO_TTL_SEC = 3600  # Relectura de info estática (vendor/versiones/capabilities) cada 1h
+    # Bloque de diagnóstico coalescido (HR 0x0006..0x0025 = 32 regs, una sola trama):
+    # info variable (uptime/status/errors) + reservas (=0) + estadísticas Modbus
+    DIAG_BLOCK_START = HR_INFO_RUNTIME_START
+    DIAG_BLOCK_COUNT = HR_DIAG_START + HR_DIAG_LEN - HR_INFO_RUNTIME_START
+    
+    # Escritura diferida a BD (write-behind)
+    DB_QUEUE_MAX_BATCHES = 1000  # Lotes (ciclos) pendientes como máximo; al llenarse se descarta el más antiguo
+    DB_WRITER_BATCH_ROWS = 500  # El writer agrupa lotes hasta ~500 filas por transacción...
+    DB_WRITER_LINGER_SEC = 0.1  # ...o hasta 100 ms desde el primer lote recibido
+    DB_DROP_WARN_INTERVAL_SEC = 10.0  # Aviso de descartes como máximo cada 10 s
+    
+    # Emisión WebSocket desacoplada del polling
+    EMIT_QUEUE_MAX = 256  # Eventos pendientes como máximo; al llenarse se descarta el más antiguo
     
     def __init__(self, modbus_master: ModbusMaster, device_manager: DeviceManager, database: Database = None, alert_engine: AlertEngine = None, mqtt_bridge=None):
         self.modbus = modbus_master
@@ -81,29 +134,108 @@ class PollingService:
         self._thread: Optional[threading.Thread] = None
         self._stop_event = threading.Event()
         
+        # Worker de persistencia: BD + MQTT + alertas se ejecutan fuera del thread de polling
+        # para que la siguiente trama Modbus no espere a SQLite. Un solo worker: el bus RS-485
+        # es half-duplex (las lecturas siguen siendo secuenciales) y se preserva el orden FIFO.
+        self._io_pool: Optional[ThreadPoolExecutor] = None
+        
+        # Workers de polling: el planificador (_polling_loop) reparte los dispositivos
+        # debidos en colas por worker (con robo de trabajo entre ellas). Las tramas Modbus
+        # se serializan con el lock del bus (compartido con el discovery); lo que se
+        # paraleliza es el procesado de cada paquete
+        self._scheduler: Optional[WorkStealingPollScheduler] = None
+        self._workers: List[threading.Thread] = []
+        self._bus_lock = modbus_master.bus_lock
+        # Instante (time.monotonic()) a partir del cual el bus cumple el silencio
+        # entre tramas tras la última transacción (lo consulta la siguiente)
+        self._bus_free_at = 0.0
+        self._in_flight: set = set()  # unit_id encolados o en lectura
+        
         # Configuración
         self.interval_sec = Config.POLL_INTERVAL_SEC
         self.per_device_refresh_sec = Config.PER_DEVICE_REFRESH_SEC
         self.unit_ids: List[int] = []
-        self._cursor = 0
-        self._next_allowed_poll_ts = {}
+        # Min-heap de vencimientos (time.monotonic(), unit_id) compartido con los workers
+        self._due_heap: List[Tuple[float, int]] = []
+        self._heap_cond = threading.Condition()
         
         # Callbacks para emitir datos vía WebSocket
         self.on_telemetry_callback: Optional[Callable] = None
         self.on_diagnostic_callback: Optional[Callable] = None
         
+        # Anillo acotado de eventos (callback, payload) hacia el thread despachador:
+        # un cliente WebSocket lento nunca bloquea a los workers de polling.
+        # deque.append/popleft son atómicos en CPython: sin lock por evento; con
+        # maxlen el anillo descarta solo el más antiguo. El Event avisa de datos nuevos.
+        # Cada payload lleva un 'seq' creciente para que el cliente detecte huecos
+        self._emit_q: deque = deque(maxlen=self.EMIT_QUEUE_MAX)
+        self._emit_evt = threading.Event()
+        self._emit_thread: Optional[threading.Thread] = None
+        self._emit_seq = itertools.count(1)
+        self._emit_dropped = 0
+        
+        # Backoff adaptativo por errores (Config copiada en start(): sin lecturas de Config por tick)
+        self._base_backoff = Config.OFFLINE_BACKOFF_SEC
+        self._cap_backoff = Config.OFFLINE_BACKOFF_MAX_SEC
+        self._max_shift = 0
+        
         # Contadores para diagnósticos/ticks
-        self._tick_counter = 0
         self._diag_every_ticks = 10
-        self._consec_errors = {}
+        self._gateway_tick_counter = 0
+        self._next_gateway_diag_tick = 0
+        # Contador agregado compartido por los workers de polling
+        self._gateway_tick_lock = threading.Lock()
+        # Estado por dispositivo en arrays contiguos (SoA) indexados por posición fija
+        # en la lista de start(): sin hash ni int en caja por acceso en el camino caliente
+        self._uid_to_idx: Dict[int, int] = {}
+        self._consec_errors = array('I')  # Errores consecutivos de lectura
+        self._device_tick_counter = array('I')  # Ticks leídos por dispositivo
+        self._next_diag_tick = array('I')  # Tick en el que toca el siguiente diagnóstico
         
         # Tracking de estado de conectividad de dispositivos
         self._device_online_state = {}  # {unit_id: bool}
-        self._device_offline_timestamp = {}  # {unit_id: timestamp} - cuando pasó a offline
+        self._device_offline_timestamp = {}  # {unit_id: time.monotonic()} - cuando pasó a offline
         
         # Caché de diagnóstico para evitar lecturas Modbus adicionales
         self._diagnostic_cache = {}  # {unit_id: diagnostic_data}
         
+        # Medidas pendientes de volcar a BD (columnas, ver _new_measurement_columns)
+        # Se acumulan durante un ciclo round-robin completo y se entregan al writer de BD
+        self._pending_measurements = self._new_measurement_columns()
+        
+        # Cola acotada de lotes hacia el thread writer de BD: el commit SQLite no
+        # bloquea nunca al worker de E/S ni, por tanto, la cadencia del bus Modbus
+        self._db_queue: queue.Queue = queue.Queue(maxsize=self.DB_QUEUE_MAX_BATCHES)
+        self._db_writer_thread: Optional[threading.Thread] = None
+        self._db_dropped_rows = 0
+        self._db_drop_warn_ts = 0.0
+        
+        # Caché de configuración de sensores (umbrales) para evitar un SELECT por medida
+        # Se invalida desde cualquier ruta que modifique la tabla sensors (invalidate_sensor)
+        self._sensor_cache: dict[str, dict] = {}
+        
+        # Alias por dispositivo para los payloads (evita formatear f"Unit {uid}" por trama)
+        # Se rellena en start() y se refresca desde el observador del DeviceManager
+        self._alias_cache: Dict[int, str] = {}
+        
+        # Vista local {unit_id: Device} de los dispositivos en polling: se crea en start()
+        # y la mantiene al día el observador del DeviceManager (_on_device_mutated)
+        self._dev_view: Dict[int, Device] = {}
+        device_manager.register_listener(self._on_device_mutated)
+        
+        # Lectores de telemetría especializados por dispositivo: {unit_id: (capabilities, lector)}
+        # La estrategia de lectura se resuelve al crear el lector, no en cada tick
+        self._readers: Dict[int, Tuple[tuple, Callable[..., dict]]] = {}
+        
+        # sensor_id precalculados por dispositivo: {unit_id: {sufijo: "UNIT_{unit_id}_{sufijo}"}}
+        self._sensor_id_cache: dict[int, dict[str, str]] = {}
+        
+        # Atributos MQTT precalculados por dispositivo: {unit_id: ((capabilities, alias, rig_id), atributos)}
+        self._device_attr_cache: Dict[int, Tuple[tuple, dict]] = {}
+        
+        # Caché de info básica del dispositivo (HR 0x0000-0x0009), casi estática
+        self._static_info_cache = {}  # {unit_id: (info, time.monotonic() de la lectura)}
+        
         # Timeout para eliminar dispositivos offline del polling (180 segundos)
         self.OFFLINE_REMOVAL_TIMEOUT_SEC = 180
         
@@ -156,24 +288,64 @@ class PollingService:
         for unit_id in unit_ids:
             if not self.device_mgr.get_device(unit_id):
                 logger.info(f"Dispositivo {unit_id} no en caché, creando entrada básica")
-                from device_manager import Device
                 device = Device(unit_id)
                 device.status = "online"
                 device.last_seen = datetime.now()
                 self.device_mgr.devices[unit_id] = device
+        self._dev_view = {uid: self.device_mgr.get_device(uid) for uid in self.unit_ids}
+        self._alias_cache = {}
+        self._refresh_alias_cache(self._dev_view)
+        self._readers = {}
+        self._refresh_readers(self._dev_view)
         
-        # Inicializar planificador
-        self._cursor = 0
-        self._next_allowed_poll_ts = {uid: 0.0 for uid in self.unit_ids}
-        self._device_tick_counter = {uid: 0 for uid in self.unit_ids}  # Contador por dispositivo
+        # Inicializar planificador: vencimientos escalonados a lo largo de un periodo
+        now = time.monotonic()
+        period = self._device_period()
+        with self._heap_cond:
+            self._due_heap = [
+                (now + i * period / len(self.unit_ids), uid) for i, uid in enumerate(self.unit_ids)
+            ]
+            heapq.heapify(self._due_heap)
+        self._uid_to_idx = {uid: i for i, uid in enumerate(self.unit_ids)}
+        self._device_tick_counter = array('I', [0] * len(self.unit_ids))  # Contador por dispositivo
         self._gateway_tick_counter = 0  # Contador para diagnóstico agregado del Gateway
         self._diag_every_ticks = 10  # Diagnóstico cada 10 ticks (~10 segundos por dispositivo)
-        self._consec_errors = {uid: 0 for uid in self.unit_ids}
+        self._next_diag_tick = array('I', [self._diag_every_ticks] * len(self.unit_ids))
+        self._next_gateway_diag_tick = self._diag_every_ticks * len(self.unit_ids)
+        self._consec_errors = array('I', [0] * len(self.unit_ids))
+        self._in_flight.clear()
+        
+        # Backoff: base·2^(n-1) con tope; a partir de _max_shift errores el tope ya se alcanza
+        self._base_backoff = Config.OFFLINE_BACKOFF_SEC
+        self._cap_backoff = Config.OFFLINE_BACKOFF_MAX_SEC
+        self._max_shift = (
+            max(0, math.ceil(math.log2(self._cap_backoff / self._base_backoff)))
+            if 0 < self._base_backoff < self._cap_backoff else 0
+        )
 
         self._stop_event.clear()
         self._active = True
+        self._io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="polling-io")
+        self._db_writer_thread = threading.Thread(
+            target=self._db_writer_loop, daemon=True, name="polling-db-writer"
+        )
+        self._db_writer_thread.start()
+        self._emit_thread = threading.Thread(
+            target=self._emit_dispatcher_loop, daemon=True, name="polling-emit"
+        )
+        self._emit_thread.start()
         
-        # Crear thread
+        # Workers de polling (como mucho uno por dispositivo)
+        num_workers = max(1, min(len(self.unit_ids), Config.MAX_POLL_WORKERS))
+        self._scheduler = WorkStealingPollScheduler(num_workers)
+        self._workers = [
+            threading.Thread(target=self._poll_worker, args=(idx,), daemon=True, name=f"polling-worker-{idx}")
+            for idx in range(num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+        
+        # Crear thread planificador
         self._thread = threading.Thread(target=self._polling_loop, daemon=True)
         self._thread.start()
         
@@ -187,11 +359,41 @@ class PollingService:
         logger.info("Deteniendo polling...")
         self._active = False
         self._stop_event.set()
+        with self._heap_cond:
+            self._heap_cond.notify_all()
         
         if self._thread:
             self._thread.join(timeout=5.0)
             self._thread = None
         
+        for worker in self._workers:
+            worker.join(timeout=5.0)
+        self._workers = []
+        if self._scheduler:
+            self._scheduler.clear()
+        self._in_flight.clear()
+        
+        # Despachar los eventos ya encolados y parar el despachador
+        if self._emit_thread:
+            self._emit_q.append(None)
+            self._emit_evt.set()
+            self._emit_thread.join(timeout=5.0)
+            self._emit_thread = None
+        
+        # No perder las medidas del ciclo en curso (tras terminar los workers)
+        self._submit_io(self._flush_pending_measurements)
+        
+        # Esperar a que se persistan las medidas ya encoladas
+        if self._io_pool:
+            self._io_pool.shutdown(wait=True)
+            self._io_pool = None
+        
+        # Señal de fin al writer (tras el último lote) y esperar a que vacíe la cola
+        if self._db_writer_thread:
+            self._db_queue.put(None)
+            self._db_writer_thread.join(timeout=10.0)
+            self._db_writer_thread = None
+        
         logger.info("Polling detenido")
     
     def is_active(self) -> bool:
@@ -206,165 +408,488 @@ class PollingService:
             'per_device_refresh_sec': self.per_device_refresh_sec,
             'tick_interval_sec': (max(self.MIN_INTERVAL_SEC, self.per_device_refresh_sec / max(1, len(self.unit_ids))) if self.unit_ids else None),
             'unit_ids': self.unit_ids,
-            'devices_monitored': len(self.unit_ids)
+            'devices_monitored': len(self.unit_ids),
+            'dropped_events': self._emit_dropped
         }
     
+    def _on_device_mutated(self, unit_id: int, device: Optional[Device]):
+        """
+        Observador del DeviceManager: actualiza la vista local, el alias y el lector
+        de telemetría de un dispositivo en polling cuando cambia su identidad.
+        
+        Args:
+            unit_id: ID del dispositivo modificado
+            device: Device actualizado o None si el UnitID deja de existir
+        """
+        # _uid_to_idx conserva el slot SoA de los dispositivos retirados del polling
+        # (_remove_device_from_polling): la pertenencia la da unit_ids
+        if unit_id not in self.unit_ids:
+            return  # No está en polling
+        if device is None:
+            self._dev_view.pop(unit_id, None)
+            self._readers.pop(unit_id, None)
+            return
+        self._dev_view[unit_id] = device
+        self._refresh_alias_cache({unit_id: device})
+        self._refresh_readers({unit_id: device})
+    
+    def _refresh_alias_cache(self, devices: dict):
+        """
+        Actualiza la caché de alias a partir de un dict {unit_id: Device}.
+        Solo se reescriben las entradas que cambian (p.ej. alias editado desde la API).
+        """
+        cache = self._alias_cache
+        for unit_id, device in devices.items():
+            if device is not None:
+                if cache.get(unit_id) != device.alias:
+                    cache[unit_id] = device.alias
+            elif unit_id not in cache:
+                cache[unit_id] = f"Unit {unit_id}"
+    
+    def _alias(self, unit_id: int) -> str:
+        """Alias del dispositivo para los payloads (desde caché)"""
+        alias = self._alias_cache.get(unit_id)
+        if alias is None:
+            device = self.device_mgr.get_device(unit_id)
+            alias = self._alias_cache[unit_id] = device.alias if device else f"Unit {unit_id}"
+        return alias
+    
+    def _device_period(self) -> float:
+        """
+        Periodo de lectura de cada dispositivo (s).
+        
+        Objetivo per_device_refresh_sec, sin bajar de MIN_INTERVAL_SEC entre
+        lecturas consecutivas del bus (N dispositivos ⇒ N * MIN_INTERVAL_SEC).
+        """
+        return max(self.per_device_refresh_sec, self.MIN_INTERVAL_SEC * max(1, len(self.unit_ids)))
+    
     def _polling_loop(self):
-        """Bucle principal de polling (ejecuta en thread)"""
+        """
+        Planificador (ejecuta en thread): saca del min-heap el dispositivo con
+        vencimiento más próximo, espera exactamente hasta ese instante y lo
+        encola para los workers de polling, que hacen la lectura Modbus.
+        
+        Los workers devuelven cada dispositivo al heap al terminar
+        (_reschedule_unit) con su siguiente vencimiento o su backoff.
+        """
         logger.info("Entrando en bucle de polling...")
         
+        next_cycle = time.monotonic()
+        last_dispatch = float('-inf')
+        
         while not self._stop_event.is_set():
-            tick_start = time.time()
-
-            if not self.unit_ids:
-                self._stop_event.wait(timeout=self.MIN_INTERVAL_SEC)
+            now = time.monotonic()
+            
+            # Tareas de fin de ciclo: volcado a BD y purga de offline
+            if now >= next_cycle:
+                self._submit_io(self._flush_pending_measurements)
+                self._remove_expired_offline_devices(now)
+                next_cycle = now + self._device_period()
+            
+            with self._heap_cond:
+                if self._stop_event.is_set():
+                    break
+                if not self._due_heap:
+                    self._heap_cond.wait(timeout=next_cycle - now)
+                    continue
+                due, unit_id = self._due_heap[0]
+                # Respetar la separación mínima entre tramas de dispositivos distintos
+                # y no despachar antes de que el bus haya cumplido el silencio entre tramas
+                ready_at = max(due, last_dispatch + self.MIN_INTERVAL_SEC, self._bus_free_at)
+                delay = min(ready_at, next_cycle) - now
+                if delay > 0:
+                    self._heap_cond.wait(timeout=delay)
+                    continue
+                heapq.heappop(self._due_heap)
+            
+            if unit_id not in self.unit_ids:
+                continue  # Eliminado del polling mientras estaba en el heap
+            
+            # Lectura, diagnóstico y persistencia reutilizan el Device de la vista local
+            device = self._dev_view.get(unit_id)
+            if device is None:
+                # Aún sin entrada en el DeviceManager al arrancar
+                device = self.device_mgr.get_device(unit_id)
+                if device is not None:
+                    self._dev_view[unit_id] = device
+            
+            # Instante único del tick: una sola lectura de reloj por dispositivo y tick
+            # (el formateo ISO se hace en el worker, fuera del hilo planificador)
+            tick_dt = datetime.now()
+            self._in_flight.add(unit_id)
+            self._scheduler.push((unit_id, device, tick_dt, due), unit_id)
+            last_dispatch = now
+        
+        logger.info("Saliendo del bucle de polling")
+    
+    def _remove_expired_offline_devices(self, now: float):
+        """Elimina del polling los dispositivos offline durante más de OFFLINE_REMOVAL_TIMEOUT_SEC"""
+        devices_to_remove = []
+        for unit_id in list(self.unit_ids):
+            if unit_id in self._device_offline_timestamp and unit_id not in self._in_flight:
+                offline_duration = now - self._device_offline_timestamp[unit_id]
+                if offline_duration > self.OFFLINE_REMOVAL_TIMEOUT_SEC:
+                    devices_to_remove.append(unit_id)
+                    logger.warning(f"⏱️  Dispositivo unit_{unit_id} offline durante {offline_duration:.0f}s - ELIMINANDO del polling")
+        
+        # Eliminar dispositivos que excedieron el timeout
+        for unit_id in devices_to_remove:
+            self._remove_device_from_polling(unit_id)
+    
+    def _reschedule_unit(self, unit_id: int, due: float, backoff: Optional[float]):
+        """
+        Devuelve un dispositivo al heap de vencimientos tras su lectura.
+        
+        Args:
+            unit_id: ID del dispositivo
+            due: Vencimiento (monotónico) con el que se despachó
+            backoff: Segundos de espera por error (None si la lectura fue correcta)
+        """
+        now = time.monotonic()
+        if backoff:
+            next_due = now + backoff
+        else:
+            # Sin deriva: siguiente vencimiento relativo al anterior; si ya pasó
+            # (timeouts en el bus), re-anclar en lugar de encadenar lecturas atrasadas
+            next_due = max(due + self._device_period(), now)
+        with self._heap_cond:
+            heapq.heappush(self._due_heap, (next_due, unit_id))
+            self._heap_cond.notify()
+    
+    def _poll_worker(self, idx: int):
+        """Worker de polling (thread): ejecuta trabajos de su cola o robados a otros workers"""
+        while not self._stop_event.is_set():
+            job = self._scheduler.get(idx, timeout=self.MIN_INTERVAL_SEC)
+            if job is None:
                 continue
+            unit_id, device, tick_dt, due = job
+            backoff = None
+            try:
+                backoff = self._poll_unit(unit_id, device, tick_dt)
+            finally:
+                self._in_flight.discard(unit_id)
+                self._reschedule_unit(unit_id, due, backoff)
+    
+    def _poll_unit(self, unit_id: int, device: Optional[Device], tick_dt: datetime) -> Optional[float]:
+        """
+        Lectura completa de un dispositivo en un tick: telemetría, estado online/offline,
+        backoff, emisión, persistencia y diagnóstico periódico.
+        
+        Todos los payloads del tick (telemetría, diagnóstico, BD, MQTT) y el last_seen
+        del dispositivo comparten el instante tick_dt y su forma ISO, calculada una vez.
+        
+        Solo cada transacción Modbus ocupa el bus (ver _bus_transaction); la
+        normalización, emisión y persistencia de esta trama se solapan con la
+        petición/espera de respuesta del siguiente dispositivo en otro worker.
+        
+        Returns:
+            Segundos de backoff si hubo error, None si la lectura fue correcta
+        """
+        backoff = None
+        slot = self._uid_to_idx[unit_id]
+        tick_ts = tick_dt.isoformat()
+        try:
+            telemetry_data = self._read_telemetry(unit_id, tick_ts, device, tick_dt)
 
-            # Round-robin: un dispositivo por tick
-            unit_id = self.unit_ids[self._cursor]
-            self._cursor = (self._cursor + 1) % len(self.unit_ids)
-
-            now = time.time()
-            next_allowed = self._next_allowed_poll_ts.get(unit_id, 0.0)
-            if now < next_allowed:
-                logger.debug(f"Backoff activo unit {unit_id}, próximo intento en {next_allowed - now:.2f}s")
-            else:
-                try:
-                    # Elevar temporalmente el timeout si hay errores consecutivos
-                    errors = self._consec_errors.get(unit_id, 0)
-                    old_timeout = getattr(self.modbus.client, 'timeout', None)
-                    if old_timeout is not None and errors > 0:
-                        # Escalar timeout hasta ~1.2s máx
-                        new_timeout = min(Config.MODBUS_TIMEOUT * (2 ** min(errors, 3)), 1.2)
-                        self.modbus.client.timeout = new_timeout
-                        logger.debug(f"unit {unit_id}: timeout escalado a {new_timeout:.2f}s por {errors} errores")
-
-                    telemetry_data = self._read_telemetry(unit_id)
-
-                    if telemetry_data:
-                        if telemetry_data.get('status') == 'ok':
-                            self._next_allowed_poll_ts[unit_id] = 0.0
-                            
-                            # Detectar cambio de estado online
-                            was_offline = self._device_online_state.get(unit_id, False) == False
-                            if was_offline and self._consec_errors.get(unit_id, 0) > 0:
-                                # Dispositivo vuelve a estar online
-                                if self.mqtt_bridge:
-                                    device_name = f"Sensor_Unit{unit_id}"
-                                    self.mqtt_bridge.publish_device_connectivity(device_name, connected=True)
-                                    logger.info(f"🟢 Dispositivo unit_{unit_id} detectado como ONLINE")
-                                
-                                # Auto-resolver todas las alertas del dispositivo que volvió online
-                                if self.alert_engine:
-                                    self.alert_engine.clear_device_alerts(unit_id)
-                            
-                            self._device_online_state[unit_id] = True
-                            self._consec_errors[unit_id] = 0
-                            
-                            # Limpiar timestamp de offline si existía
-                            if unit_id in self._device_offline_timestamp:
-                                del self._device_offline_timestamp[unit_id]
-                            # Guardar último paquete
-                            self._last_telemetry[unit_id] = telemetry_data
-                            
-                            # Actualizar last_seen del dispositivo
-                            if self.db:
-                                self.db.update_device_last_seen(unit_id)
-                            
-                            # Guardar en BD si está disponible
-                            if self.db:
-                                self._save_to_database(telemetry_data)
-                        else:
-                            # Aumentar contador y aplicar backoff adaptativo
-                            self._consec_errors[unit_id] = self._consec_errors.get(unit_id, 0) + 1
+            if telemetry_data:
+                if telemetry_data.get('status') == 'ok':
+                    # Detectar cambio de estado online
+                    was_offline = self._device_online_state.get(unit_id, False) == False
+                    if was_offline and self._consec_errors[slot] > 0:
+                        # Dispositivo vuelve a estar online
+                        if self.mqtt_bridge:
+                            device_name = f"Sensor_Unit{unit_id}"
+                            self.mqtt_bridge.publish_device_connectivity(device_name, connected=True)
+                            logger.info(f"🟢 Dispositivo unit_{unit_id} detectado como ONLINE")
+                        
+                        # Auto-resolver todas las alertas del dispositivo que volvió online
+                        if self.alert_engine:
+                            self.alert_engine.clear_device_alerts(unit_id)
+                    
+                    self._device_online_state[unit_id] = True
+                    self._consec_errors[slot] = 0
+                    
+                    # Limpiar timestamp de offline si existía
+                    if unit_id in self._device_offline_timestamp:
+                        del self._device_offline_timestamp[unit_id]
+                    # Guardar último paquete
+                    self._last_telemetry[unit_id] = telemetry_data
+                    
+                    # Actualizar last_seen y guardar en BD (en el worker de persistencia)
+                    if self.db:
+                        self._submit_io(self._persist_telemetry, telemetry_data, device)
+                else:
+                    # Aumentar contador y aplicar backoff adaptativo
+                    backoff = self._apply_error(unit_id, slot, "error")
+                    
+                    # Detectar cambio a estado offline (después de 3 errores consecutivos)
+                    if self._consec_errors[slot] == 3:
+                        was_online = self._device_online_state.get(unit_id, True)
+                        if was_online:
+                            # Dispositivo pasa a estar offline
+                            self._device_online_state[unit_id] = False
+                            self._device_offline_timestamp[unit_id] = time.monotonic()
                             
-                            # Detectar cambio a estado offline (después de 3 errores consecutivos)
-                            if self._consec_errors[unit_id] == 3:
-                                was_online = self._device_online_state.get(unit_id, True)
-                                if was_online:
-                                    # Dispositivo pasa a estar offline
-                                    self._device_online_state[unit_id] = False
-                                    self._device_offline_timestamp[unit_id] = time.time()
-                                    
-                                    # Limpiar caché de diagnóstico
-                                    if unit_id in self._diagnostic_cache:
-                                        del self._diagnostic_cache[unit_id]
-                                    
-                                    if self.mqtt_bridge:
-                                        device_name = f"Sensor_Unit{unit_id}"
-                                        self.mqtt_bridge.publish_device_connectivity(device_name, connected=False)
-                                        logger.warning(f"🔴 Dispositivo unit_{unit_id} detectado como OFFLINE")
+                            # Limpiar caché de diagnóstico (e info estática: puede volver reiniciado/sustituido)
+                            if unit_id in self._diagnostic_cache:
+                                del self._diagnostic_cache[unit_id]
+                            self._static_info_cache.pop(unit_id, None)
                             
-                            base = Config.OFFLINE_BACKOFF_SEC
-                            cap = Config.OFFLINE_BACKOFF_MAX_SEC
-                            backoff = min(base * (2 ** (self._consec_errors[unit_id] - 1)), cap)
-                            self._next_allowed_poll_ts[unit_id] = now + backoff
-                            logger.debug(f"unit {unit_id}: error => backoff {backoff:.1f}s (errores={self._consec_errors[unit_id]})")
-
-                        if self.on_telemetry_callback:
-                            logger.info(f"🔔 Llamando callback telemetría para unit {unit_id}, status={telemetry_data.get('status')}")
-                            self.on_telemetry_callback(telemetry_data)
+                            if self.mqtt_bridge:
+                                device_name = f"Sensor_Unit{unit_id}"
+                                self.mqtt_bridge.publish_device_connectivity(device_name, connected=False)
+                                logger.warning(f"🔴 Dispositivo unit_{unit_id} detectado como OFFLINE")
 
-                    # Diagnósticos cada N ticks por dispositivo (~10 segundos)
-                    # Solo si el dispositivo está online
-                    self._device_tick_counter[unit_id] += 1
-                    if (self._device_tick_counter[unit_id] % self._diag_every_ticks) == 0:
-                        is_online = self._device_online_state.get(unit_id, False)
-                        if is_online:
-                            diagnostic_data = self._read_diagnostic(unit_id)
-                            if diagnostic_data:
-                                # Guardar en caché para diagnóstico agregado del Gateway
-                                self._diagnostic_cache[unit_id] = diagnostic_data
-                                
-                                # Emitir vía WebSocket (dashboard local)
-                                if self.on_diagnostic_callback:
-                                    self.on_diagnostic_callback(diagnostic_data)
-                                
-                                # Publicar diagnóstico individual del dispositivo
-                                self._publish_diagnostic_to_mqtt(unit_id, diagnostic_data)
-                    
-                    # Diagnóstico agregado del Gateway (total de todos los dispositivos)
-                    self._gateway_tick_counter += 1
-                    if (self._gateway_tick_counter % (self._diag_every_ticks * len(self.unit_ids))) == 0:
-                        self._publish_gateway_diagnostic_to_mqtt()
+                if self.on_telemetry_callback:
+                    logger.debug("🔔 Encolando telemetría para unit %d, status=%s", unit_id, telemetry_data.get('status'))
+                    self._emit(self.on_telemetry_callback, telemetry_data)
 
-                    time.sleep(Config.INTER_FRAME_DELAY_MS / 1000.0)
+            # Diagnósticos cada N ticks por dispositivo (~10 segundos)
+            # Solo si el dispositivo está online
+            # (comparación con el siguiente tick programado, sin módulo por tick)
+            self._device_tick_counter[slot] += 1
+            if self._device_tick_counter[slot] == self._next_diag_tick[slot]:
+                self._next_diag_tick[slot] += self._diag_every_ticks
+                is_online = self._device_online_state.get(unit_id, False)
+                if is_online:
+                    diagnostic_data = self._read_diagnostic(unit_id, tick_ts)
+                    if diagnostic_data:
+                        # Guardar en caché para diagnóstico agregado del Gateway
+                        self._diagnostic_cache[unit_id] = diagnostic_data
+                        
+                        # Emitir vía WebSocket (dashboard local)
+                        if self.on_diagnostic_callback:
+                            self._emit(self.on_diagnostic_callback, diagnostic_data)
+                        
+                        # Publicar diagnóstico individual del dispositivo
+                        self._publish_diagnostic_to_mqtt(unit_id, diagnostic_data)
+            
+            # Diagnóstico agregado del Gateway (total de todos los dispositivos)
+            # (cada _diag_every_ticks ticks de cada dispositivo; el paso se recalcula al
+            # dispararse, así sigue siendo correcto si cambia el número de dispositivos)
+            # (incremento y umbral bajo lock: un solo worker dispara cada publicación)
+            with self._gateway_tick_lock:
+                self._gateway_tick_counter += 1
+                publish_gateway = self._gateway_tick_counter >= self._next_gateway_diag_tick
+                if publish_gateway:
+                    self._next_gateway_diag_tick = (
+                        self._gateway_tick_counter + self._diag_every_ticks * max(1, len(self.unit_ids))
+                    )
+            if publish_gateway:
+                self._publish_gateway_diagnostic_to_mqtt(tick_ts)
 
+        except Exception as e:
+            logger.error(f"Error al leer datos de unit {unit_id}: {e}")
+            backoff = self._apply_error(unit_id, slot, "excepción")
+        
+        return backoff
+    
+    def _apply_error(self, unit_id: int, slot: int, reason: str) -> float:
+        """
+        Cuenta un error consecutivo del dispositivo y calcula su backoff.
+        
+        backoff = base·2^(n-1) con tope en OFFLINE_BACKOFF_MAX_SEC; el exponente se
+        limita a _max_shift para que el desplazamiento no crezca sin fin.
+        
+        Args:
+            unit_id: ID del dispositivo
+            slot: Índice del dispositivo en los arrays SoA
+            reason: Motivo para la traza ("error" o "excepción")
+        
+        Returns:
+            Segundos de backoff
+        """
+        errors = self._consec_errors[slot] + 1
+        self._consec_errors[slot] = errors
+        backoff = min(self._base_backoff * (1 << min(errors - 1, self._max_shift)), self._cap_backoff)
+        logger.debug("unit %d: %s => backoff %.1fs (errores=%d)", unit_id, reason, backoff, errors)
+        return backoff
+    
+    def _emit(self, callback: Callable, payload: dict):
+        """
+        Encola un evento para el thread despachador de WebSocket.
+        
+        Añade al payload un número de secuencia global 'seq'. Si el anillo está
+        lleno el deque descarta el evento más antiguo (contador dropped_events).
+        Sin despachador activo se llama al callback directamente.
+        """
+        payload['seq'] = next(self._emit_seq)
+        dispatcher = self._emit_thread
+        if not dispatcher or not dispatcher.is_alive():
+            callback(payload)
+            return
+        
+        emit_q = self._emit_q
+        if len(emit_q) == emit_q.maxlen:
+            self._emit_dropped += 1  # append() expulsa el más antiguo
+        emit_q.append((callback, payload))
+        self._emit_evt.set()
+    
+    def _emit_dispatcher_loop(self):
+        """Thread despachador: ejecuta los callbacks de emisión en orden. Termina al recibir None"""
+        emit_q = self._emit_q
+        while True:
+            self._emit_evt.wait()
+            # Limpiar antes de vaciar: un append posterior vuelve a activar el Event
+            self._emit_evt.clear()
+            while emit_q:
+                item = emit_q.popleft()
+                if item is None:
+                    return
+                callback, payload = item
+                try:
+                    callback(payload)
                 except Exception as e:
-                    logger.error(f"Error al leer datos de unit {unit_id}: {e}")
-                    self._consec_errors[unit_id] = self._consec_errors.get(unit_id, 0) + 1
-                    base = Config.OFFLINE_BACKOFF_SEC
-                    cap = Config.OFFLINE_BACKOFF_MAX_SEC
-                    backoff = min(base * (2 ** (self._consec_errors[unit_id] - 1)), cap)
-                    self._next_allowed_poll_ts[unit_id] = time.time() + backoff
-                    logger.debug(f"unit {unit_id}: excepción => backoff {backoff:.1f}s (errores={self._consec_errors[unit_id]})")
-                finally:
-                    # Restaurar timeout original si fue modificado
-                    if old_timeout is not None and errors > 0:
-                        self.modbus.client.timeout = old_timeout
-
-            # Verificar dispositivos offline por más de 180 segundos y eliminarlos
-            now = time.time()
-            devices_to_remove = []
-            for unit_id in list(self.unit_ids):
-                if unit_id in self._device_offline_timestamp:
-                    offline_duration = now - self._device_offline_timestamp[unit_id]
-                    if offline_duration > self.OFFLINE_REMOVAL_TIMEOUT_SEC:
-                        devices_to_remove.append(unit_id)
-                        logger.warning(f"⏱️  Dispositivo unit_{unit_id} offline durante {offline_duration:.0f}s - ELIMINANDO del polling")
+                    logger.error(f"Error en callback de emisión (unit {payload.get('unit_id')}): {e}")
+    
+    def _bus_transaction(self, unit_id: int, fn: Callable, *args, **kwargs):
+        """
+        Ejecuta una única transacción Modbus con el bus RS-485 en exclusiva.
+        
+        El lock cubre solo petición + respuesta: el procesado de la respuesta se
+        hace fuera, de modo que mientras un worker decodifica su trama otro ya
+        está esperando la respuesta del siguiente dispositivo (pipeline sin más
+        de una petición en vuelo en el bus). El silencio entre tramas no se
+        duerme al terminar: se marca _bus_free_at y solo la siguiente
+        transacción espera lo que quede de él, normalmente nada porque ya se
+        ha consumido en procesado, emisión y planificación.
+        Si el dispositivo acumula errores consecutivos se eleva temporalmente
+        el timeout del cliente solo para esta transacción.
+        
+        Args:
+            unit_id: ID del dispositivo destino
+            fn: Método de ModbusMaster a invocar
+            *args, **kwargs: Argumentos de fn
+        
+        Returns:
+            Resultado de fn
+        """
+        with self._bus_lock:
+            wait = self._bus_free_at - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            slot = self._uid_to_idx.get(unit_id)
+            errors = self._consec_errors[slot] if slot is not None else 0
+            try:
+                with self.modbus.scaled_timeout(errors):
+                    return fn(*args, **kwargs)
+            finally:
+                # Fin del silencio entre tramas exigido antes de la siguiente petición
+                self._bus_free_at = time.monotonic() + Config.INTER_FRAME_DELAY_MS / 1000.0
+    
+    def _submit_io(self, fn: Callable, *args):
+        """
+        Encola trabajo de persistencia en el worker de E/S.
+        Si el pool no está disponible (p.ej. durante stop()), se ejecuta en línea.
+        """
+        pool = self._io_pool
+        if pool:
+            try:
+                pool.submit(fn, *args)
+                return
+            except RuntimeError:
+                pass  # Pool ya cerrado
+        fn(*args)
+    
+    def _persist_telemetry(self, telemetry_data: dict, device: Optional[Device] = None):
+        """Actualiza last_seen del dispositivo y guarda la telemetría (ejecuta en worker de E/S)"""
+        try:
+            self.db.update_device_last_seen(telemetry_data['unit_id'])
+            self._save_to_database(telemetry_data, device)
+        except Exception as e:
+            logger.error(f"Error al persistir telemetría de unit {telemetry_data.get('unit_id')}: {e}")
+    
+    def _flush_pending_measurements(self):
+        """
+        Entrega al writer de BD las medidas acumuladas en el ciclo actual.
+        
+        Doble buffer: el acumulador lleno pasa a la cola y se sustituye por uno
+        vacío, de modo que el worker de E/S nunca espera al commit SQLite.
+        Si la cola está llena se descarta el lote más antiguo (con aviso limitado).
+        Sin writer activo (p.ej. tras stop()) se escribe directamente.
+        """
+        columns = self._pending_measurements
+        count = len(columns['sensor_id'])
+        if not self.db or not count:
+            return
+        
+        self._pending_measurements = self._new_measurement_columns()
+        
+        writer = self._db_writer_thread
+        if not writer or not writer.is_alive():
+            self._write_measurement_batches([columns], count)
+            return
+        
+        try:
+            self._db_queue.put_nowait(columns)
+        except queue.Full:
+            try:
+                dropped = self._db_queue.get_nowait()
+                self._db_dropped_rows += len(dropped['sensor_id'])
+            except queue.Empty:
+                pass
+            self._db_queue.put_nowait(columns)
             
-            # Eliminar dispositivos que excedieron el timeout
-            for unit_id in devices_to_remove:
-                self._remove_device_from_polling(unit_id)
-
-            # Mantener objetivo de 1s por dispositivo ⇒ tick ≈ 1/len(unit_ids)
-            target_tick = max(self.MIN_INTERVAL_SEC, self.per_device_refresh_sec / max(1, len(self.unit_ids)))
-            elapsed = time.time() - tick_start
-            sleep_time = max(0.0, target_tick - elapsed)
-            if sleep_time > 0:
-                self._stop_event.wait(timeout=sleep_time)
+            now = time.monotonic()
+            if now - self._db_drop_warn_ts >= self.DB_DROP_WARN_INTERVAL_SEC:
+                self._db_drop_warn_ts = now
+                logger.warning(
+                    f"⚠️ Cola de BD llena: descartado lote más antiguo "
+                    f"({self._db_dropped_rows} medidas descartadas en total)"
+                )
+    
+    def _db_writer_loop(self):
+        """
+        Thread writer de BD: agrupa lotes de la cola hasta DB_WRITER_BATCH_ROWS
+        filas o DB_WRITER_LINGER_SEC, y los inserta en una sola transacción.
+        Termina al recibir None (tras escribir lo pendiente).
+        """
+        while True:
+            batch = self._db_queue.get()
+            if batch is None:
+                return
+            
+            batches = [batch]
+            count = len(batch['sensor_id'])
+            deadline = time.monotonic() + self.DB_WRITER_LINGER_SEC
+            stop = False
+            while count < self.DB_WRITER_BATCH_ROWS:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch = self._db_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if batch is None:
+                    stop = True
+                    break
+                batches.append(batch)
+                count += len(batch['sensor_id'])
+            
+            self._write_measurement_batches(batches, count)
+            if stop:
+                return
+    
+    def _write_measurement_batches(self, batches: list, count: int):
+        """Inserta en BD uno o varios lotes columnares en una única transacción"""
+        try:
+            # zip() sobre las columnas genera las filas en C, sin dicts intermedios
+            rows = itertools.chain.from_iterable(zip(*columns.values()) for columns in batches)
+            self.db.flush_measurements(rows)
+            logger.debug("💾 %d medidas volcadas a BD", count)
+        except Exception as e:
+            logger.error(f"Error al volcar {count} medidas a BD: {e}")
+    
+    @staticmethod
+    def _new_measurement_columns() -> dict:
+        """
+        Acumulador de medidas en formato columnar (una lista por columna).
         
-        logger.info("Saliendo del bucle de polling")
+        El orden de las claves coincide con el de las columnas del INSERT de
+        Database.flush_measurements(): (timestamp, sensor_id, type, value, unit, quality).
+        """
+        return {'ts': [], 'sensor_id': [], 'type': [], 'value': [], 'unit': [], 'quality': []}
     
     def _remove_device_from_polling(self, unit_id: int):
         """
@@ -389,18 +914,26 @@ class PollingService:
             if unit_id in self._diagnostic_cache:
                 del self._diagnostic_cache[unit_id]
             
-            if unit_id in self._consec_errors:
-                del self._consec_errors[unit_id]
+            if unit_id in self._static_info_cache:
+                del self._static_info_cache[unit_id]
             
-            if unit_id in self._next_allowed_poll_ts:
-                del self._next_allowed_poll_ts[unit_id]
+            self._readers.pop(unit_id, None)
+            self._dev_view.pop(unit_id, None)
             
-            if unit_id in self._device_tick_counter:
-                del self._device_tick_counter[unit_id]
+            # Los arrays SoA mantienen su posición (índices fijos desde start()): solo se reinician
+            slot = self._uid_to_idx.get(unit_id)
+            if slot is not None:
+                self._consec_errors[slot] = 0
+                self._device_tick_counter[slot] = 0
+                self._next_diag_tick[slot] = self._diag_every_ticks
             
             if unit_id in self._last_telemetry:
                 del self._last_telemetry[unit_id]
             
+            if unit_id in self._sensor_id_cache:
+                del self._sensor_id_cache[unit_id]
+            self._device_attr_cache.pop(unit_id, None)
+            
             # Limpiar alertas activas del dispositivo
             if self.alert_engine:
                 self.alert_engine.clear_device_alerts(unit_id)
@@ -410,6 +943,58 @@ class PollingService:
         except Exception as e:
             logger.error(f"Error al eliminar dispositivo unit_{unit_id}: {e}", exc_info=True)
     
+    def _get_sensor_ids(self, unit_id: int) -> dict[str, str]:
+        """Devuelve (construyendo la primera vez) los sensor_id de un dispositivo indexados por sufijo."""
+        ids = self._sensor_id_cache.get(unit_id)
+        if ids is None:
+            suffixes = [field[1] for field in _SCALAR_FIELDS]
+            for field in _VECTOR_FIELDS:
+                suffixes.append(field[1])
+                suffixes.extend(axis_suffix for axis_suffix, _ in field[4])
+            ids = {suffix: f"UNIT_{unit_id}_{suffix}" for suffix in suffixes}
+            self._sensor_id_cache[unit_id] = ids
+        return ids
+    
+    def _get_device_attributes(self, unit_id: int, device: Device, alias: str) -> dict:
+        """
+        Devuelve los atributos MQTT del dispositivo, reconstruyéndolos solo si
+        cambian sus capabilities, alias o rig_id (no en cada paquete).
+        """
+        key = (self._capabilities_key(device), alias, getattr(device, 'rig_id', 'default'))
+        entry = self._device_attr_cache.get(unit_id)
+        if entry is None or entry[0] != key:
+            caps, alias, rig_id = key
+            entry = self._device_attr_cache[unit_id] = (key, {
+                'alias': alias,  # Nombre/alias del dispositivo
+                'unit_id': unit_id,
+                'capabilities': ', '.join(sorted(set(caps))),
+                'rig_id': rig_id
+            })
+        return entry[1]
+    
+    def _get_sensor_info(self, sensor_id: str) -> Optional[dict]:
+        """Devuelve la configuración del sensor desde caché (consulta BD solo la primera vez)."""
+        sensor_info = self._sensor_cache.get(sensor_id)
+        if sensor_info is None and self.db:
+            sensor_info = self.db.get_sensor(sensor_id)
+            if sensor_info:
+                self._sensor_cache[sensor_id] = sensor_info
+        return sensor_info
+    
+    def invalidate_sensor(self, sensor_id: Optional[str] = None):
+        """
+        Invalida la caché de configuración de sensores.
+        
+        Debe llamarse tras modificar la tabla sensors (alta de sensores, cambio de umbrales).
+        
+        Args:
+            sensor_id: Sensor a invalidar (si None, se vacía la caché completa)
+        """
+        if sensor_id is None:
+            self._sensor_cache.clear()
+        else:
+            self._sensor_cache.pop(sensor_id, None)
+    
     def get_last_wind(self, unit_id: int) -> Optional[dict]:
         """Retorna último paquete de viento para unit_id (o None si no hay)."""
         data = self._last_telemetry.get(unit_id)
@@ -452,241 +1037,258 @@ class PollingService:
         """Convierte uint16 a int16 (complemento a 2)"""
         return val if val < 32768 else val - 65536
     
-    def _read_telemetry(self, unit_id: int) -> Optional[dict]:
+    @staticmethod
+    def _to_uint32(lo: int, hi: int) -> int:
+        """Combina dos registros (LSW, MSW) en un uint32"""
+        return ((hi & 0xFFFF) << 16) | (lo & 0xFFFF)
+    
+    def _read_telemetry(self, unit_id: int, timestamp: Optional[str] = None,
+                        device: Optional[Device] = None,
+                        seen_at: Optional[datetime] = None) -> Optional[dict]:
         """
         Lee telemetría de un dispositivo.
         
+        Usa el lector especializado del dispositivo (ver _make_reader), creado
+        en start() o al cambiar sus capabilities; solo si aún no existe se
+        construye aquí.
+        
         Args:
             unit_id: ID del dispositivo
+            timestamp: ISO8601 del tick de polling (si None, se toma datetime.now())
+            device: Device del ciclo actual (si None, se busca en el DeviceManager)
+            seen_at: datetime del tick, para el last_seen del dispositivo (si None, datetime.now())
         
         Returns:
             Dict con telemetría normalizada o None si error
         """
-        # Seleccionar estrategia de lectura según capacidades
-        device = self.device_mgr.get_device(unit_id)
-        caps = set(device.capabilities) if device and isinstance(device.capabilities, list) else set()
+        ts = timestamp or datetime.now().isoformat()
+        try:
+            entry = self._readers.get(unit_id)
+            if entry is None:
+                if device is None:
+                    device = self.device_mgr.get_device(unit_id)
+                entry = self._readers[unit_id] = self._make_reader(unit_id, device)
+            return entry[1](ts, seen_at)
+        except Exception as e:
+            logger.error(f"Error al leer/normalizar telemetría de unit {unit_id}: {e}")
+            self.device_mgr.update_device_status(unit_id, success=False)
+            return None
+    
+    def _refresh_readers(self, devices: dict):
+        """
+        Reconstruye los lectores de telemetría de los dispositivos del dict
+        {unit_id: Device} cuyas capabilities hayan cambiado (o que aún no tengan).
+        """
+        for unit_id, device in devices.items():
+            caps = self._capabilities_key(device)
+            entry = self._readers.get(unit_id)
+            if entry is None or entry[0] != caps:
+                self._readers[unit_id] = self._make_reader(unit_id, device)
+    
+    @staticmethod
+    def _capabilities_key(device: Optional[Device]) -> tuple:
+        """Capabilities del dispositivo como tupla inmutable (vacía si no hay lista)"""
+        return tuple(device.capabilities) if device and isinstance(device.capabilities, list) else ()
+    
+    def _make_reader(self, unit_id: int, device: Optional[Device]) -> Tuple[tuple, Callable[..., dict]]:
+        """
+        Crea el lector de telemetría especializado para las capabilities del dispositivo.
+        
+        La estrategia de lectura (ventana de registros, longitud mínima y decodificador)
+        se resuelve una sola vez aquí en lugar de en cada tick:
+            • Load-only: 4 regs @0x0009 (sample_count, quality_flags, load)
+            • Wind-only: 9 regs @0x0009 (valores actuales + estadísticas de viento)
+            • MPU (con o sin Load): 12/13 regs @0x0000
+            • Con Wind y MPU/Load: bloque extendido completo (27 regs)
+        La trama RTU de la petición también se precompila aquí (unit_id, inicio y
+        cantidad son fijos por dispositivo).
+        
+        Args:
+            unit_id: ID del dispositivo
+            device: Device con sus capabilities (o None)
+        
+        Returns:
+            Tupla (capabilities, lector); el lector recibe el timestamp ISO del
+            tick y su datetime (last_seen) y devuelve el paquete de telemetría
+            (status 'ok' o 'error')
+        """
+        caps_key = self._capabilities_key(device)
+        caps = set(caps_key)
         has_wind = 'Wind' in caps
         has_mpu = 'MPU6050' in caps
         has_load = 'Load' in caps
-
-        # Utilidades locales
-        def to_uint32(lo: int, hi: int) -> int:
-            return ((hi & 0xFFFF) << 16) | (lo & 0xFFFF)
-
-        try:
-            # Caso 1: solo Load (sin MPU ni Wind) → OPTIMIZADO: leer solo 4 registros necesarios
+        capabilities = list(caps_key)
+        
+        if has_load and not has_mpu and not has_wind:
             # IR[9-10]: sample_count (LSW+MSW), IR[11]: quality_flags, IR[12]: load_kg
-            if has_load and not has_mpu and not has_wind:
-                raw_regs = self.modbus.read_input_registers(unit_id, 0x0009, 4, retry=True)
-                logger.info(f"📊 UnitID {unit_id} load-only raw (4 regs @0x0009): {raw_regs}")
-
-                if not raw_regs or len(raw_regs) < 4:
-                    logger.warning(f"No se pudo leer telemetría (load-only) de unit {unit_id}")
-                    self.device_mgr.update_device_status(unit_id, success=False)
-                    return {
-                        'unit_id': unit_id,
-                        'alias': device.alias if device else f"Unit {unit_id}",
-                        'timestamp': datetime.now().isoformat(),
-                        'status': 'error',
-                        'error': 'timeout_or_crc_error'
-                    }
-
-                # Construir telemetría manualmente (más eficiente que llamar al normalizer con array parcial)
-                telemetry = {
-                    'sample_count': to_uint32(raw_regs[0], raw_regs[1]),
-                    'quality_flags': raw_regs[2],
-                    'load_g': self._to_int16(raw_regs[3]) * 10.0,  # ckg → gramos
-                    'load_kg': self._to_int16(raw_regs[3]) / 100.0  # ckg → kg
-                }
-                logger.info(
-                    f"⚖️ unit {unit_id} load-only: {telemetry['load_g']:.2f}g, samples={telemetry['sample_count']}"
-                )
-                self.device_mgr.update_device_status(unit_id, success=True)
-                return {
-                    'unit_id': unit_id,
-                    'alias': device.alias if device else f"Unit {unit_id}",
-                    'timestamp': datetime.now().isoformat(),
-                    'telemetry': telemetry,
-                    'status': 'ok'
-                }
-
-            # Caso 2: solo viento → ampliar ventana para incluir estadísticas (0x0009..0x0011 ⇒ 9 registros)
-            if has_wind and not has_mpu:
-                regs = self.modbus.read_input_registers(unit_id, 0x0009, 9, retry=True)
-
-                logger.info(
-                    f"📊 UnitID {unit_id} wind-only raw window (9 regs) @0x0009: {regs}"
-                )
-
-                if not regs or len(regs) < 6:  # mínimo para valores actuales
-                    logger.warning(f"No se pudo leer telemetría (wind-only) de unit {unit_id}")
-                    self.device_mgr.update_device_status(unit_id, success=False)
-                    return {
-                        'unit_id': unit_id,
-                        'alias': device.alias if device else f"Unit {unit_id}",
-                        'timestamp': datetime.now().isoformat(),
-                        'status': 'error',
-                        'error': 'timeout_or_crc_error'
-                    }
-
-                wind_speed_mps = regs[4] / 100.0
-                telemetry = {
-                    'sample_count': to_uint32(regs[0], regs[1]),
-                    'wind_speed_mps': wind_speed_mps,
-                    'wind_speed_kmh': wind_speed_mps * 3.6,
-                    'wind_direction_deg': regs[5]
-                }
-                if len(regs) >= 9:
-                    wind_min_mps = regs[6] / 100.0
-                    wind_max_mps = regs[7] / 100.0
-                    wind_avg_mps = regs[8] / 100.0
-                    telemetry['wind_stats'] = {
-                        'min_mps': wind_min_mps,
-                        'max_mps': wind_max_mps,
-                        'avg_mps': wind_avg_mps,
-                        'min_kmh': wind_min_mps * 3.6,
-                        'max_kmh': wind_max_mps * 3.6,
-                        'avg_kmh': wind_avg_mps * 3.6
-                    }
-
-                logger.info(
-                    f"🌬️ unit {unit_id} wind-only: speed={telemetry['wind_speed_mps']:.2f} m/s ({telemetry['wind_speed_kmh']:.2f} km/h), dir={telemetry['wind_direction_deg']}°"
+            label, start, count, min_len = 'load-only', 0x0009, 4, 4
+            decode = self._decode_load_only
+        elif has_wind and not has_mpu:
+            # 0x0009..0x0011 ⇒ 9 registros (6 como mínimo para valores actuales)
+            label, start, count, min_len = 'wind-only', 0x0009, 9, 6
+            decode = self._decode_wind_only
+        elif has_mpu and not has_wind:
+            # Sin Load: 12 registros (0x0000-0x000B); con Load: 13 (0x0000-0x000C)
+            count = 13 if has_load else 12
+            label, start, min_len = 'mpu-only', self.IR_TELEMETRY_START, count
+            decode = lambda uid, regs: self.normalizer.normalize_telemetry(regs, capabilities)
+        else:
+            # base(13) + wind(2) + wind_stats(3) + accel_stats(9) = 27 registros
+            label, start, count = 'wind', self.IR_TELEMETRY_START, self.IR_TOTAL_WITH_WIND_AND_STATS
+            min_len = self.IR_TELEMETRY_COUNT
+            decode = lambda uid, regs: self._decode_with_wind(uid, regs, capabilities)
+        
+        read_input_precompiled = self.modbus.read_input_precompiled
+        frame = build_rtu_read_input(unit_id, start, count)
+        
+        def reader(ts: str, seen_at: Optional[datetime] = None) -> dict:
+            raw_regs = self._bus_transaction(unit_id, read_input_precompiled, unit_id, frame, count, retry=True)
+            if logger.isEnabledFor(logging.DEBUG):
+                # El repr de los registros solo se construye con DEBUG activo
+                logger.debug(
+                    "📊 UnitID %d %s raw (%d/%d regs @0x%04X): %s",
+                    unit_id, label, len(raw_regs) if raw_regs else 0, count, start,
+                    list(raw_regs) if raw_regs else None
                 )
-                if 'wind_stats' in telemetry:
-                    ws = telemetry['wind_stats']
-                    logger.info(
-                        f"📈 wind stats unit {unit_id}: min={ws['min_mps']:.2f} m/s max={ws['max_mps']:.2f} m/s avg={ws['avg_mps']:.2f} m/s"
-                    )
-
-                self.device_mgr.update_device_status(unit_id, success=True)
-                return {
-                    'unit_id': unit_id,
-                    'alias': device.alias if device else f"Unit {unit_id}",
-                    'timestamp': datetime.now().isoformat(),
-                    'telemetry': telemetry,
-                    'status': 'ok'
-                }
-
-            # Caso 3: solo MPU (sin Load ni Wind) → leer solo MPU data (12 regs, sin load)
-            # O si tiene MPU+Load pero NO Wind → leer 13 regs (todo el bloque base)
-            if has_mpu and not has_wind:
-                # Si NO tiene Load, solo necesitamos 12 registros (0x0000-0x000B)
-                # Si tiene Load, necesitamos 13 registros (0x0000-0x000C)
-                count = 13 if has_load else 12
-                raw_regs = self.modbus.read_input_registers(unit_id, self.IR_TELEMETRY_START, count, retry=True)
-                logger.info(f"📊 UnitID {unit_id} mpu{'+ load' if has_load else ''}-only raw ({len(raw_regs) if raw_regs else 0}/{count}): {raw_regs}")
-
-                if not raw_regs or len(raw_regs) < count:
-                    logger.warning(f"No se pudo leer telemetría (mpu-only) de unit {unit_id}")
-                    self.device_mgr.update_device_status(unit_id, success=False)
-                    return {
-                        'unit_id': unit_id,
-                        'alias': device.alias if device else f"Unit {unit_id}",
-                        'timestamp': datetime.now().isoformat(),
-                        'status': 'error',
-                        'error': 'timeout_or_crc_error'
-                    }
-
-                telemetry = self.normalizer.normalize_telemetry(raw_regs, device.capabilities)
-                self.device_mgr.update_device_status(unit_id, success=True)
-                return {
-                    'unit_id': unit_id,
-                    'alias': device.alias if device else f"Unit {unit_id}",
-                    'timestamp': datetime.now().isoformat(),
-                    'telemetry': telemetry,
-                    'status': 'ok'
-                }
-
-            # Caso 4: tiene Wind (con o sin MPU/Load) → leer bloque extendido completo (27 regs)
-            # Incluye: base(13) + wind(2) + wind_stats(3) + accel_stats(9) = 27 registros
-            read_count = self.IR_TOTAL_WITH_WIND_AND_STATS
-            raw_regs = self.modbus.read_input_registers(unit_id, self.IR_TELEMETRY_START, read_count, retry=True)
             
-            logger.info(f"📊 UnitID {unit_id} with-wind raw ({len(raw_regs) if raw_regs else 0}/{read_count})")
-
-            if not raw_regs or len(raw_regs) < self.IR_TELEMETRY_COUNT:
-                logger.warning(f"No se pudo leer telemetría (wind) de unit {unit_id}")
+            if not raw_regs or len(raw_regs) < min_len:
+                logger.warning(f"No se pudo leer telemetría ({label}) de unit {unit_id}")
                 self.device_mgr.update_device_status(unit_id, success=False)
                 return {
                     'unit_id': unit_id,
-                    'alias': device.alias if device else f"Unit {unit_id}",
-                    'timestamp': datetime.now().isoformat(),
+                    'alias': self._alias(unit_id),
+                    'timestamp': ts,
                     'status': 'error',
                     'error': 'timeout_or_crc_error'
                 }
-
-            telemetry = self.normalizer.normalize_telemetry(raw_regs, device.capabilities)
-            if 'wind_speed_mps' in telemetry:
-                logger.info(
-                    f"🌬️ unit {unit_id} both: speed={telemetry['wind_speed_mps']:.2f} m/s ({telemetry.get('wind_speed_kmh', 0):.2f} km/h), dir={telemetry.get('wind_direction_deg')}°"
-                )
-            if 'wind_stats' in telemetry:
-                ws = telemetry['wind_stats']
-                logger.info(
-                    f"📈 wind stats unit {unit_id}: min={ws['min_mps']:.2f} m/s max={ws['max_mps']:.2f} m/s avg={ws['avg_mps']:.2f} m/s"
-                )
-            if 'acceleration_stats' in telemetry:
-                axs = telemetry['acceleration_stats']
-                logger.info(
-                    "🧪 accel stats unit %d: X(min=%.3f max=%.3f avg=%.3f) Y(min=%.3f max=%.3f avg=%.3f) Z(min=%.3f max=%.3f avg=%.3f)" % (
-                        unit_id,
-                        axs['x_g']['min'], axs['x_g']['max'], axs['x_g']['avg'],
-                        axs['y_g']['min'], axs['y_g']['max'], axs['y_g']['avg'],
-                        axs['z_g']['min'], axs['z_g']['max'], axs['z_g']['avg']
-                    )
-                )
-
-            self.device_mgr.update_device_status(unit_id, success=True)
+            
+            telemetry = decode(unit_id, raw_regs)
+            self.device_mgr.update_device_status(unit_id, success=True, seen_at=seen_at)
             return {
                 'unit_id': unit_id,
-                'alias': device.alias if device else f"Unit {unit_id}",
-                'timestamp': datetime.now().isoformat(),
+                'alias': self._alias(unit_id),
+                'timestamp': ts,
                 'telemetry': telemetry,
                 'status': 'ok'
             }
+        
+        return caps_key, reader
+    
+    def _decode_load_only(self, unit_id: int, raw_regs: list) -> dict:
+        """Telemetría load-only (4 regs @0x0009), construida sin pasar por el normalizer"""
+        load_ckg = self._to_int16(raw_regs[3])
+        telemetry = {
+            'sample_count': self._to_uint32(raw_regs[0], raw_regs[1]),
+            'quality_flags': raw_regs[2],
+            'load_g': load_ckg * 10.0,  # ckg → gramos
+            'load_kg': load_ckg / 100.0  # ckg → kg
+        }
+        logger.debug(
+            "⚖️ unit %d load-only: %.2fg, samples=%d", unit_id, telemetry['load_g'], telemetry['sample_count']
+        )
+        return telemetry
+    
+    def _decode_wind_only(self, unit_id: int, regs: list) -> dict:
+        """Telemetría wind-only (6-9 regs @0x0009): viento actual y estadísticas si vienen"""
+        wind_speed_mps = regs[4] / 100.0
+        telemetry = {
+            'sample_count': self._to_uint32(regs[0], regs[1]),
+            'quality_flags': regs[2],  # IR 0x000B: evita una lectura aparte en diagnóstico
+            'wind_speed_mps': wind_speed_mps,
+            'wind_speed_kmh': wind_speed_mps * 3.6,
+            'wind_direction_deg': regs[5]
+        }
+        if len(regs) >= 9:
+            wind_min_mps = regs[6] / 100.0
+            wind_max_mps = regs[7] / 100.0
+            wind_avg_mps = regs[8] / 100.0
+            telemetry['wind_stats'] = {
+                'min_mps': wind_min_mps,
+                'max_mps': wind_max_mps,
+                'avg_mps': wind_avg_mps,
+                'min_kmh': wind_min_mps * 3.6,
+                'max_kmh': wind_max_mps * 3.6,
+                'avg_kmh': wind_avg_mps * 3.6
+            }
 
-        except Exception as e:
-            logger.error(f"Error al leer/normalizar telemetría de unit {unit_id}: {e}")
-            self.device_mgr.update_device_status(unit_id, success=False)
-            return None
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "🌬️ unit %d wind-only: speed=%.2f m/s (%.2f km/h), dir=%s°",
+                unit_id, telemetry['wind_speed_mps'], telemetry['wind_speed_kmh'], telemetry['wind_direction_deg']
+            )
+            if 'wind_stats' in telemetry:
+                ws = telemetry['wind_stats']
+                logger.debug(
+                    "📈 wind stats unit %d: min=%.2f m/s max=%.2f m/s avg=%.2f m/s",
+                    unit_id, ws['min_mps'], ws['max_mps'], ws['avg_mps']
+                )
+        return telemetry
+    
+    def _decode_with_wind(self, unit_id: int, raw_regs: list, capabilities: list) -> dict:
+        """Telemetría del bloque extendido (27 regs) normalizada, con trazas de viento y aceleración"""
+        telemetry = self.normalizer.normalize_telemetry(raw_regs, capabilities)
+        if not logger.isEnabledFor(logging.DEBUG):
+            return telemetry
+        
+        if 'wind_speed_mps' in telemetry:
+            logger.debug(
+                "🌬️ unit %d both: speed=%.2f m/s (%.2f km/h), dir=%s°",
+                unit_id, telemetry['wind_speed_mps'], telemetry.get('wind_speed_kmh', 0),
+                telemetry.get('wind_direction_deg')
+            )
+        if 'wind_stats' in telemetry:
+            ws = telemetry['wind_stats']
+            logger.debug(
+                "📈 wind stats unit %d: min=%.2f m/s max=%.2f m/s avg=%.2f m/s",
+                unit_id, ws['min_mps'], ws['max_mps'], ws['avg_mps']
+            )
+        if 'acceleration_stats' in telemetry:
+            axs = telemetry['acceleration_stats']
+            logger.debug(
+                "🧪 accel stats unit %d: X(min=%.3f max=%.3f avg=%.3f) Y(min=%.3f max=%.3f avg=%.3f) Z(min=%.3f max=%.3f avg=%.3f)",
+                unit_id,
+                axs['x_g']['min'], axs['x_g']['max'], axs['x_g']['avg'],
+                axs['y_g']['min'], axs['y_g']['max'], axs['y_g']['avg'],
+                axs['z_g']['min'], axs['z_g']['max'], axs['z_g']['avg']
+            )
+        return telemetry
     
-    def _read_diagnostic(self, unit_id: int) -> Optional[dict]:
+    def _read_diagnostic(self, unit_id: int, timestamp: Optional[str] = None) -> Optional[dict]:
         """
         Lee diagnósticos completos de un dispositivo.
         
         Args:
             unit_id: ID del dispositivo
+            timestamp: ISO8601 del tick de polling (si None, se toma datetime.now())
         
         Returns:
             Dict con información de diagnóstico o None si error
         """
         try:
-            # Leer info básica
-            info = self.modbus.read_device_info(unit_id)
+            # Leer info básica + estadísticas Modbus (una trama si la info estática está en caché)
+            info, diag = self._read_info_and_diagnostics(unit_id)
             if not info:
                 logger.warning(f"No se pudo leer info de unit {unit_id}")
                 return None
-            
-            # Leer estadísticas Modbus
-            diag = self.modbus.read_device_diagnostics(unit_id)
             if not diag:
                 logger.warning(f"No se pudo leer diagnósticos de unit {unit_id}")
                 return None
             
-            # Leer quality flags
-            quality_flags = self.modbus.read_quality_flags(unit_id)
+            # Quality flags: ya vienen en la última trama de telemetría (IR 0x000B),
+            # solo se leen aparte si el modo de lectura del dispositivo no los incluye
+            last_telemetry = self._last_telemetry.get(unit_id, {}).get('telemetry', {})
+            quality_flags = last_telemetry.get('quality_flags')
+            if quality_flags is None:
+                quality_flags = self._bus_transaction(unit_id, self.modbus.read_quality_flags, unit_id)
             
             # Decodificar bitmasks
             capabilities = self.modbus.decode_capabilities(info['capabilities'])
             status = self.modbus.decode_status(info['status'])
             
-            # Obtener device info del manager
-            device = self.device_mgr.get_device(unit_id)
-            
             # Construir payload completo
             return {
                 'unit_id': unit_id,
-                'alias': device.alias if device else f"Unit {unit_id}",
+                'alias': self._alias(unit_id),
                 'vendor_id': info['vendor_id'],
                 'product_id': info['product_id'],
                 'hw_version': info['hw_version'],
@@ -707,36 +1309,85 @@ class PollingService:
                     'last_exception': diag['last_exception']
                 },
                 'quality_flags': quality_flags,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': timestamp or datetime.now().isoformat()
             }
         
         except Exception as e:
             logger.error(f"Error al leer diagnósticos de unit {unit_id}: {e}")
             return None
     
-    def _publish_measurement_to_mqtt(self, unit_id: int, sensor_id: str, sensor_type: str, value: float, unit: str, timestamp: str):
+    def _read_info_and_diagnostics(self, unit_id: int) -> Tuple[Optional[dict], Optional[dict]]:
+        """
+        Lee la info básica del dispositivo y sus estadísticas Modbus.
+        
+        Los campos estáticos (vendor, versiones, capabilities) solo se releen cada
+        STATIC_INFO_TTL_SEC. Mientras están en caché, la parte variable de la info
+        y el diagnóstico se leen juntos en una única trama (DIAG_BLOCK_*) y se
+        trocean en Python, en lugar de dos transacciones separadas.
+        Se detecta reinicio del dispositivo (uptime menor que el anterior).
+        
+        Args:
+            unit_id: ID del dispositivo
+        
+        Returns:
+            Tupla (info, diag) con el formato de ModbusMaster.read_device_info() y
+            read_device_diagnostics(); (None, None) o (info, None) si error
+        """
+        now = time.monotonic()
+        cached = self._static_info_cache.get(unit_id)
+        if cached and (now - cached[1]) < self.STATIC_INFO_TTL_SEC:
+            regs = self._bus_transaction(
+                unit_id, self.modbus.read_block, unit_id, self.DIAG_BLOCK_START, self.DIAG_BLOCK_COUNT
+            )
+            if not regs:
+                return None, None
+            
+            static_info, read_ts = cached
+            diag_offset = HR_DIAG_START - self.DIAG_BLOCK_START
+            info = dict(static_info, **self.modbus.decode_info_runtime(regs[:HR_INFO_RUNTIME_LEN]))
+            diag = self.modbus.decode_device_diagnostics(regs[diag_offset:diag_offset + HR_DIAG_LEN])
+            
+            if info['uptime_s'] < static_info['uptime_s']:
+                # Reinicio: la info estática puede haber cambiado (p.ej. firmware nuevo)
+                logger.info(f"🔄 unit_{unit_id}: reinicio detectado (uptime={info['uptime_s']}s)")
+                self._static_info_cache.pop(unit_id, None)
+            else:
+                self._static_info_cache[unit_id] = (info, read_ts)
+            return info, diag
+        
+        info = self._bus_transaction(unit_id, self.modbus.read_device_info, unit_id)
+        if not info:
+            return None, None
+        if cached and info['uptime_s'] < cached[0]['uptime_s']:
+            logger.info(f"🔄 unit_{unit_id}: reinicio detectado (uptime={info['uptime_s']}s)")
+        self._static_info_cache[unit_id] = (info, now)
+        
+        diag = self._bus_transaction(unit_id, self.modbus.read_device_diagnostics, unit_id)
+        return info, diag
+    
+    def _publish_measurements_to_mqtt(self, unit_id: int, measurements: list, timestamp: str):
         """
-        Helper para publicar medida via MQTT bridge.
+        Helper para publicar todas las medidas de un paquete via MQTT bridge en un solo batch.
         
         Args:
             unit_id: ID del dispositivo Modbus
-            sensor_id: ID completo del sensor (ej: "UNIT_2_TILT_X")
-            sensor_type: Tipo de sensor (tilt, wind, temperature, etc.)
-            value: Valor medido
-            unit: Unidad de medida
+            measurements: Lista de tuplas (sensor_id, sensor_type, value, unit)
             timestamp: ISO8601 timestamp
         """
-        if self.mqtt_bridge:
+        if self.mqtt_bridge and measurements:
             device_id = f"unit_{unit_id}"
-            self.mqtt_bridge.publish_measurement(
-                device_id=device_id,
-                sensor_id=sensor_id,
-                sensor_type=sensor_type,
-                value=value,
-                unit=unit,
-                timestamp=timestamp,
-                quality="GOOD"
-            )
+            self.mqtt_bridge.publish_batch_measurements([
+                {
+                    'device_id': device_id,
+                    'sensor_id': sensor_id,
+                    'sensor_type': sensor_type,
+                    'value': value,
+                    'unit': unit,
+                    'timestamp': timestamp,
+                    'quality': "GOOD"
+                }
+                for sensor_id, sensor_type, value, unit in measurements
+            ])
     
     
     def _publish_diagnostic_to_mqtt(self, unit_id: int, diagnostic_data: dict):
@@ -785,7 +1436,7 @@ class PollingService:
             logger.error(f"Error al publicar diagnóstico individual: {e}", exc_info=True)
     
     
-    def _publish_gateway_diagnostic_to_mqtt(self):
+    def _publish_gateway_diagnostic_to_mqtt(self, timestamp: Optional[str] = None):
         """
         Publica diagnóstico agregado del Gateway (maestro Modbus) a MQTT/ThingsBoard.
         
@@ -793,6 +1444,9 @@ class PollingService:
         la salud global del bus Modbus en el Gateway (RPI_EDGE).
         
         Usa caché de diagnóstico para evitar lecturas Modbus adicionales.
+        
+        Args:
+            timestamp: ISO8601 del tick de polling (si None, se toma datetime.now())
         """
         if not self.mqtt_bridge:
             return
@@ -825,7 +1479,7 @@ class PollingService:
             success_rate = (total_rx_ok / total_requests * 100) if total_requests > 0 else 100.0
             
             # Publicar en el Gateway (device_id = "gateway")
-            timestamp = datetime.now().isoformat()
+            timestamp = timestamp or datetime.now().isoformat()
             self.mqtt_bridge.publish_measurement(
                 device_id="gateway",
                 sensor_id="GATEWAY_MODBUS_DIAG",
@@ -851,7 +1505,33 @@ class PollingService:
             logger.error(f"Error al publicar diagnóstico del Gateway: {e}", exc_info=True)
     
     
-    def _save_to_database(self, telemetry_data: dict):
+    def _record_measurement(self, sensor_id: str, sensor_type: str, value: float, unit: str,
+                            timestamp: str, mqtt_batch: list = None, alert_checks: list = None):
+        """
+        Encola una medida para BD, para MQTT y para verificación de umbrales.
+        
+        Args:
+            sensor_id: ID completo del sensor (ej: "UNIT_2_TILT_X")
+            sensor_type: Tipo de sensor (tilt, wind, temperature, etc.)
+            value: Valor medido
+            unit: Unidad de medida
+            timestamp: ISO8601 timestamp
+            mqtt_batch: Lista donde acumular la medida para MQTT (None = no publicar)
+            alert_checks: Lista donde acumular (sensor_id, valor) para alertas (None = sin alertas)
+        """
+        columns = self._pending_measurements
+        columns['ts'].append(timestamp)
+        columns['sensor_id'].append(sensor_id)
+        columns['type'].append(sensor_type)
+        columns['value'].append(value)
+        columns['unit'].append(unit)
+        columns['quality'].append('OK')
+        if mqtt_batch is not None:
+            mqtt_batch.append((sensor_id, sensor_type, value, unit))
+        if alert_checks is not None:
+            alert_checks.append((sensor_id, value))
+    
+    def _save_to_database(self, telemetry_data: dict, device: Optional[Device] = None):
         """
         Guarda telemetría en la base de datos y publica a MQTT.
         
@@ -862,9 +1542,12 @@ class PollingService:
             - El sensor_id se construye como "UNIT_{unit_id}_{tipo}"
             - Permite consultas granulares y agregación flexible para ThingsBoard
             - Publica cada medida a MQTT para integración con plataformas IoT
+            - Las medidas se encolan y se insertan en BD al final del ciclo
+              round-robin (_flush_pending_measurements)
         
         Args:
             telemetry_data: Dict con telemetría desde _read_telemetry()
+            device: Device del ciclo de polling (si None, se busca en el DeviceManager)
         """
         if not telemetry_data or telemetry_data.get('status') != 'ok':
             return
@@ -875,232 +1558,75 @@ class PollingService:
             timestamp = telemetry_data['timestamp']
             telemetry = telemetry_data.get('telemetry', {})
             
-            # Obtener capabilities del dispositivo para determinar tipo
-            device = self.device_mgr.get_device(unit_id)
-            capabilities = set(device.capabilities) if device and device.capabilities else set()
-            
             # Publicar atributos del dispositivo a ThingsBoard (solo una vez por dispositivo)
-            if self.mqtt_bridge and device:
-                device_name = f"Sensor_Unit{unit_id}"
-                attributes = {
-                    'alias': alias,  # Nombre/alias del dispositivo
-                    'unit_id': unit_id,
-                    'capabilities': ', '.join(sorted(capabilities)),
-                    'rig_id': device.rig_id if hasattr(device, 'rig_id') else 'default'
-                }
-                self.mqtt_bridge.publish_device_attributes(device_name, attributes)
-            
-            # Determinar tipo principal del sensor
-            # Prioridad: MPU6050 > Wind > Load
-            if 'MPU6050' in capabilities:
-                main_type = 'tilt'
-            elif 'Wind' in capabilities:
-                main_type = 'wind'
-            elif 'Load' in capabilities:
-                main_type = 'load'
-            else:
-                main_type = 'generic'
-            
-            # MEDIDAS DE INCLINACIÓN (MPU6050)
-            if 'angle_x_deg' in telemetry:
-                sensor_id = f"UNIT_{unit_id}_TILT_X"
-                value = telemetry['angle_x_deg']
-                
-                self.db.insert_measurement({
-                    'sensor_id': sensor_id,
-                    'type': 'tilt',
-                    'value': value,
-                    'unit': 'deg',
-                    'quality': 'OK',
-                    'timestamp': timestamp
-                })
-                
-                # Publicar a MQTT
-                self._publish_measurement_to_mqtt(unit_id, sensor_id, 'tilt', value, 'deg', timestamp)
-                
-                # Verificar umbrales de alerta
-                if self.alert_engine:
-                    sensor_info = self.db.get_sensor(sensor_id)
-                    if sensor_info:
-                        self.alert_engine.check_measurement_thresholds(
-                            sensor_id, value, sensor_info
-                        )
+            if self.mqtt_bridge:
+                if device is None:
+                    device = self.device_mgr.get_device(unit_id)
+                if device:
+                    self.mqtt_bridge.publish_device_attributes(
+                        f"Sensor_Unit{unit_id}", self._get_device_attributes(unit_id, device, alias)
+                    )
             
-            if 'angle_y_deg' in telemetry:
-                sensor_id = f"UNIT_{unit_id}_TILT_Y"
-                value = telemetry['angle_y_deg']
-                
-                self.db.insert_measurement({
-                    'sensor_id': sensor_id,
-                    'type': 'tilt',
-                    'value': value,
-                    'unit': 'deg',
-                    'quality': 'OK',
-                    'timestamp': timestamp
-                })
-                
-                # Publicar a MQTT
-                self._publish_measurement_to_mqtt(unit_id, sensor_id, 'tilt', value, 'deg', timestamp)
-                
-                # Verificar umbrales de alerta
-                if self.alert_engine:
-                    sensor_info = self.db.get_sensor(sensor_id)
-                    if sensor_info:
-                        self.alert_engine.check_measurement_thresholds(
-                            sensor_id, value, sensor_info
-                        )
+            # Las medidas se acumulan en self._pending_measurements y se vuelcan
+            # a BD una vez por ciclo round-robin (ver _flush_pending_measurements)
+            pending_before = len(self._pending_measurements['sensor_id'])
+            # Medidas a publicar a MQTT en un único batch por paquete
+            mqtt_batch = []
+            # Pares (sensor_id, valor) pendientes de verificar umbrales de alerta
+            alert_checks = []
             
-            # TEMPERATURA (MPU6050)
-            if 'temperature_c' in telemetry:
-                sensor_id = f"UNIT_{unit_id}_TEMP"
-                value = telemetry['temperature_c']
-                
-                self.db.insert_measurement({
-                    'sensor_id': sensor_id,
-                    'type': 'temperature',
-                    'value': value,
-                    'unit': 'celsius',
-                    'quality': 'OK',
-                    'timestamp': timestamp
-                })
-                
-                # Publicar a MQTT
-                self._publish_measurement_to_mqtt(unit_id, sensor_id, 'temperature', value, 'celsius', timestamp)
-                
-                # Verificar umbrales de alerta
-                if self.alert_engine:
-                    sensor_info = self.db.get_sensor(sensor_id)
-                    if sensor_info:
-                        self.alert_engine.check_measurement_thresholds(
-                            sensor_id, value, sensor_info
-                        )
+            # sensor_id precalculados para este dispositivo ("UNIT_{unit_id}_{sufijo}")
+            ids = self._get_sensor_ids(unit_id)
+            # Un solo lookup por campo (get + centinela en vez de "in" + "[]")
+            telemetry_get = telemetry.get
             
-            # ACELERACIÓN (MPU6050) - Guardamos la magnitud total
-            if 'acceleration' in telemetry:
-                accel = telemetry['acceleration']
-                # Magnitud vectorial: sqrt(x² + y² + z²)
-                import math
-                magnitude = math.sqrt(
-                    accel.get('x_g', 0)**2 + 
-                    accel.get('y_g', 0)**2 + 
-                    accel.get('z_g', 0)**2
+            # MAGNITUDES ESCALARES (inclinación, temperatura, viento, carga)
+            for key, suffix, sensor_type, unit, publish, check_alert in _SCALAR_FIELDS:
+                value = telemetry_get(key, _SENTINEL)
+                if value is _SENTINEL:
+                    continue
+                self._record_measurement(
+                    ids[suffix], sensor_type, value, unit, timestamp,
+                    mqtt_batch if publish else None, alert_checks if check_alert else None
                 )
-                sensor_id = f"UNIT_{unit_id}_ACCEL"
-                
-                self.db.insert_measurement({
-                    'sensor_id': sensor_id,
-                    'type': 'acceleration',
-                    'value': magnitude,
-                    'unit': 'g',
-                    'quality': 'OK',
-                    'timestamp': timestamp
-                })
-                
-                # Publicar magnitud a MQTT
-                self._publish_measurement_to_mqtt(unit_id, sensor_id, 'acceleration', magnitude, 'g', timestamp)
-                
-                # También guardamos y publicamos componentes individuales para análisis detallado
-                for axis, key in [('X', 'x_g'), ('Y', 'y_g'), ('Z', 'z_g')]:
-                    if key in accel:
-                        axis_sensor_id = f"UNIT_{unit_id}_ACCEL_{axis}"
-                        axis_value = accel[key]
-                        
-                        self.db.insert_measurement({
-                            'sensor_id': axis_sensor_id,
-                            'type': 'acceleration',
-                            'value': axis_value,
-                            'unit': 'g',
-                            'quality': 'OK',
-                            'timestamp': timestamp
-                        })
-                        
-                        # Publicar componente a MQTT
-                        self._publish_measurement_to_mqtt(unit_id, axis_sensor_id, 'acceleration', axis_value, 'g', timestamp)
             
-            # GIROSCOPIO (MPU6050) - Guardamos magnitud de velocidad angular
-            if 'gyroscope' in telemetry:
-                gyro = telemetry['gyroscope']
-                import math
-                magnitude = math.sqrt(
-                    gyro.get('x_dps', 0)**2 + 
-                    gyro.get('y_dps', 0)**2 + 
-                    gyro.get('z_dps', 0)**2
+            # MAGNITUDES VECTORIALES (MPU6050) - Guardamos la magnitud total y,
+            # si procede, los componentes individuales para análisis detallado
+            for key, suffix, sensor_type, unit, axes, with_components in _VECTOR_FIELDS:
+                vector = telemetry_get(key, _SENTINEL)
+                if vector is _SENTINEL:
+                    continue
+                vector_get = vector.get
+                # Magnitud vectorial: sqrt(x² + y² + z²) en una sola llamada C (math.hypot)
+                magnitude = math.hypot(*(vector_get(axis_key, 0) for _, axis_key in axes))
+                self._record_measurement(
+                    ids[suffix], sensor_type, magnitude, unit, timestamp, mqtt_batch
                 )
-                sensor_id = f"UNIT_{unit_id}_GYRO"
-                
-                self.db.insert_measurement({
-                    'sensor_id': sensor_id,
-                    'type': 'gyroscope',
-                    'value': magnitude,
-                    'unit': 'dps',
-                    'quality': 'OK',
-                    'timestamp': timestamp
-                })
-                
-                # Publicar a MQTT
-                self._publish_measurement_to_mqtt(unit_id, sensor_id, 'gyroscope', magnitude, 'dps', timestamp)
+                if with_components:
+                    for axis_suffix, axis_key in axes:
+                        component = vector_get(axis_key, _SENTINEL)
+                        if component is not _SENTINEL:
+                            self._record_measurement(
+                                ids[axis_suffix], sensor_type,
+                                component, unit, timestamp, mqtt_batch
+                            )
             
-            # VIENTO
-            if 'wind_speed_mps' in telemetry:
-                sensor_id = f"UNIT_{unit_id}_WIND_SPEED"
-                value = telemetry['wind_speed_mps']
-                
-                self.db.insert_measurement({
-                    'sensor_id': sensor_id,
-                    'type': 'wind',
-                    'value': value,
-                    'unit': 'm_s',
-                    'quality': 'OK',
-                    'timestamp': timestamp
-                })
-                
-                # Publicar a MQTT
-                self._publish_measurement_to_mqtt(unit_id, sensor_id, 'wind', value, 'm_s', timestamp)
-                
-                # Verificar umbrales de alerta
-                if self.alert_engine:
-                    sensor_info = self.db.get_sensor(sensor_id)
-                    if sensor_info:
-                        self.alert_engine.check_measurement_thresholds(
-                            sensor_id, value, sensor_info
-                        )
+            # Publicar a MQTT (un solo mensaje por paquete en modo ThingsBoard)
+            self._publish_measurements_to_mqtt(unit_id, mqtt_batch, timestamp)
             
-            if 'wind_direction_deg' in telemetry:
-                self.db.insert_measurement({
-                    'sensor_id': f"UNIT_{unit_id}_WIND_DIR",
-                    'type': 'wind',
-                    'value': telemetry['wind_direction_deg'],
-                    'unit': 'deg',
-                    'quality': 'OK',
-                    'timestamp': timestamp
-                })
-            
-            # CARGA (HX711)
-            if 'load_kg' in telemetry:
-                sensor_id = f"UNIT_{unit_id}_LOAD"
-                value = telemetry['load_kg']
-                
-                self.db.insert_measurement({
-                    'sensor_id': sensor_id,
-                    'type': 'load',
-                    'value': value,
-                    'unit': 'kg',
-                    'quality': 'OK',
-                    'timestamp': timestamp
-                })
-                
-                # Publicar a MQTT
-                self._publish_measurement_to_mqtt(unit_id, sensor_id, 'load', value, 'kg', timestamp)
-                
-                # Verificar umbrales de alerta
-                if self.alert_engine:
-                    sensor_info = self.db.get_sensor(sensor_id)
+            # Verificar umbrales de alerta de todo el paquete en una sola pasada
+            if self.alert_engine and alert_checks:
+                alert_batch = []
+                for sensor_id, value in alert_checks:
+                    sensor_info = self._get_sensor_info(sensor_id)
                     if sensor_info:
-                        self.alert_engine.check_measurement_thresholds(
-                            sensor_id, value, sensor_info
-                        )
+                        alert_batch.append((sensor_id, value, sensor_info))
+                self.alert_engine.check_batch(alert_batch)
             
-            logger.debug(f"💾 Telemetría de unit {unit_id} guardada en BD")
+            logger.debug(
+                "💾 Telemetría de unit %d encolada para BD (%d medidas)",
+                unit_id, len(self._pending_measurements['sensor_id']) - pending_before
+            )
             
         except Exception as e:
             logger.error(f"Error al guardar telemetría en BD: {e}")